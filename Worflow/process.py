@@ -3,11 +3,12 @@ from libraries.exception import SelectedCompetitionListEmptyAfterProcessingError
     IncorrectSubmissionFilesNames
 from libraries.logging_file import logger
 from libraries.submissionfileschecks import SubmissionFilesChecks
+from libraries.submission_scheduler import SubmissionScheduler
+from libraries.metric_engine import MetricEngine
 import os
 import re
 import glob
-
-from libraries.utils import remove_subdirectories
+import shutil
 
 
 class ProcessPreparation:
@@ -16,21 +17,41 @@ class ProcessPreparation:
     def __init__(self, zindi_user):
         self.user = zindi_user
         self.submission_files_checks = SubmissionFilesChecks()
-
-    def get_opened_competetion_names_list_make_dirs(self):
+        self.metric_engine = MetricEngine(holdout_labels=CONFIG.Submissions.holdout_labels,
+                                          chunk_rows=CONFIG.Submissions.local_metric_chunk_rows,
+                                          workers=CONFIG.Submissions.local_metric_workers)
+        self.scheduler = SubmissionScheduler(zindi_user, priorities=CONFIG.Submissions.competition_priorities,
+                                             reset_hour_utc=CONFIG.Submissions.quota_reset_hour_utc,
+                                             metric_engine=self.metric_engine)
+
+    def get_opened_competetion_names_list_make_dirs(self, remove_existing=True):
         """To get opened competitions name list"""
-        remove_subdirectories(CONFIG.ZindiCompetetionFilesPath.competetion_folder
-                              )
-
         open_challenge_data = self.user.get_opened_challenges(reward="all", kind="competition",
                                                               fixed_index=None, open_competetion=True)
         id_list = open_challenge_data["id"].tolist()
         parent_directory = CONFIG.ZindiCompetetionFilesPath.competetion_folder
+        if remove_existing:
+            self.remove_closed_competetion_dirs(id_list)
         for folder_name in id_list:
             folder_path = os.path.join(parent_directory, str(folder_name))  # Ensure it's a string
             os.makedirs(folder_path, exist_ok=True)  # Create folder if it doesn't exist
         logger.info(f"Created directories for {len(id_list)} IDs in {parent_directory}")
 
+    @staticmethod
+    def remove_closed_competetion_dirs(id_list: list) -> None:
+        """remove the folders of the closed competitions, a folder with pending submission files is kept."""
+        competition_folder = CONFIG.ZindiCompetetionFilesPath.competetion_folder
+        if not os.path.isdir(competition_folder):
+            return
+        for subdir in os.listdir(competition_folder):
+            subdir_path = os.path.join(competition_folder, subdir)
+            if not os.path.isdir(subdir_path) or subdir in id_list:
+                continue
+            if glob.glob(os.path.join(subdir_path, "*.csv")):
+                logger.info(f"Keeping {subdir_path}, it still has pending submission files")
+            else:
+                shutil.rmtree(subdir_path)
+
     def already_submission_files_present_in_competetion_folder(self) -> bool:
         """see if submission files .csv files are already present in competetino folder."""
         competition_folder = CONFIG.ZindiCompetetionFilesPath.competetion_folder
@@ -113,18 +134,11 @@ class ProcessPreparation:
 
 
     def keep_selected_competitions_submission_limit_not_reach(self,selected_competition_list:list ) -> list:
-        """ Check if  selected competetion has already read it limit of submissions."""
-        selected_competition_removed_submission_limit_reached = []
+        """ Check if  selected competetion has already read it limit of submissions, most urgent first."""
+        selected_competition_removed_submission_limit_reached = self.scheduler.plan(selected_competition_list)
         for selected_challenge in selected_competition_list:
-            daily_remaining_submission_data = self.user.availabel_remaining_submission_for_selected_competetion(
-                selected_challenge)
-            today_remaining = daily_remaining_submission_data['data']['today']
-            already_submitted = daily_remaining_submission_data['data']['submitted_today']
-            temporary = ""
-            if temporary==False:
+            if selected_challenge not in selected_competition_removed_submission_limit_reached:
                 logger.info(f"removing competition  {selected_challenge} submission already reach it limit")
-            else:
-                    selected_competition_removed_submission_limit_reached.append(selected_challenge)
         return selected_competition_removed_submission_limit_reached
 
 
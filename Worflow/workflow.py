@@ -1,7 +1,15 @@
+import datetime
+import glob
+import os
+import queue
+import threading
+import time
 import pandas as pd
 from libraries.bitwarden_credential import BitwardenCredentialManagement
-from libraries.exception import FileSizeTooLargeToSendThroughGmail
+from libraries.exception import FileSizeTooLargeToSendThroughGmail, SubmissionFilesNotPresentFolder, \
+    SelectedCompetitionListEmptyAfterProcessingError
 from libraries.utils import Utils
+from libraries.submission_watcher import SubmissionWatcher
 from libraries.zindi.user import Zindian
 from libraries.zindi_site import ZindiProcessing
 from Worflow.process import  ProcessPreparation
@@ -15,7 +23,19 @@ class Processes:
         self.bitwarden = BitwardenCredentialManagement()
         self.credential = self.bitwarden.get_bitwarden_credentials(CONFIG.CredentialsGroups.items_list)
         self.user = Zindian(username=self.credential['Zindi_Credential']['username'],
-                       fixed_password=self.credential['Zindi_Credential']['password'])
+                       fixed_password=self.credential['Zindi_Credential']['password'],
+                       pool_size=CONFIG.ZindiApi.pool_size,
+                       catalog_ttl=CONFIG.ZindiApi.catalog_ttl_seconds,
+                       catalog_path=CONFIG.ZindiApi.catalog_cache_path,
+                       leaderboard_max_age=CONFIG.ZindiApi.leaderboard_max_age_seconds,
+                       rank_page_size=CONFIG.ZindiApi.rank_page_size,
+                       rate_limit=CONFIG.ZindiApi.requests_per_second,
+                       registry_path=CONFIG.ZindiApi.joined_registry_path,
+                       download_workers=CONFIG.ZindiApi.download_workers,
+                       download_segments=CONFIG.ZindiApi.download_segments,
+                       store_path=CONFIG.ZindiApi.dataset_store_path,
+                       store_max_bytes=CONFIG.ZindiApi.dataset_store_max_bytes,
+                       dataset_format=CONFIG.ZindiApi.dataset_format)
         logger.info(" Logged into Zindi Successfully using api.")
         self.report_dataframe = pd.DataFrame()
         self.preparation_process = ProcessPreparation(zindi_user=self.user)
@@ -28,14 +48,16 @@ class Processes:
         self.zindi_processing = ZindiProcessing(self.user,
         credentials=self.credential, show_leaderboard=self.show_leaderboard, show_rank=self.show_rank,
         upload_submission_file=self.upload_submission_file, download_dataset=self.download_dataset,
-        daily_submission_remaining=self.show_daily_submission_remaining, report_dataframe=pd.DataFrame(columns=self.report_columns)
+        daily_submission_remaining=self.show_daily_submission_remaining, report_dataframe=pd.DataFrame(columns=self.report_columns),
+        workers=CONFIG.ZindiApi.competition_workers, scheduler=self.preparation_process.scheduler
             )
         self.utils = Utils(credential=self.credential)
 
 
-    def preparation_files_for_processing(self):
+    def preparation_files_for_processing(self, make_dirs=True):
         """preparation for files processing."""
-        self.preparation_process.get_opened_competetion_names_list_make_dirs()
+        if make_dirs:
+            self.preparation_process.get_opened_competetion_names_list_make_dirs()
         if  self.preparation_process.submission_files_checking():
             logger.info(" files format checks are passed.")
         selected_competition_list = self.preparation_process.make_selected_competitions_names_correct()
@@ -73,8 +95,92 @@ class Processes:
 
 
 
-    def start(self):
+    def start(self, make_dirs=True):
         """start processing."""
-        selected_competition_list = self.preparation_files_for_processing()
+        selected_competition_list = self.preparation_files_for_processing(make_dirs=make_dirs)
         self.process_zindi_site(selected_competition_list)
+        if not self.zindi_processing.wait_for_scores(timeout=CONFIG.Submissions.score_wait_seconds):
+            logger.info("Some submissions are still in processing, their score is missing from the report")
         self.sending_report_to_gmail()
+        logger.info(f"Zindi api connections {self.user.connection_stats}")
+        logger.info(f"Zindi challenges catalog cache {self.user.catalog_stats}")
+
+    def run_daemon(self, poll_seconds=CONFIG.Submissions.daemon_poll_seconds, max_cycles=None):
+        """keep the zindi session warm, drain pending submissions then sleep until the quota reset or new files."""
+        cycle = 0
+        while max_cycles is None or cycle < max_cycles:
+            try:
+                self.start(make_dirs=cycle == 0)  # later cycles must keep the deferred files
+            except (SubmissionFilesNotPresentFolder, SelectedCompetitionListEmptyAfterProcessingError) as e:
+                logger.info(f"Nothing to submit in this cycle : {type(e).__name__}")
+            except Exception as e:  # a failing cycle must not stop the daemon
+                logger.error(f"Daemon cycle failed : {e}")
+            cycle += 1
+            if max_cycles is None or cycle < max_cycles:
+                self.wait_for_next_cycle(poll_seconds)
+
+    def wait_for_next_cycle(self, poll_seconds):
+        """sleep until the next daily quota reset, or until submission files are added or changed."""
+        wake_up = self.preparation_process.scheduler.next_reset
+        logger.info(f"Daemon sleeping until {wake_up:%d %B %Y, %H:%M} UTC or new submission files")
+        seen = self.submission_files_snapshot()
+        while True:
+            remaining = (wake_up - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+            if remaining <= 0:
+                logger.info("Daily submission quota reset, draining pending submissions")
+                return
+            time.sleep(min(poll_seconds, remaining))
+            if self.submission_files_snapshot() != seen:
+                logger.info("New submission files found, draining pending submissions")
+                return
+
+    @staticmethod
+    def submission_files_snapshot() -> dict:
+        """modification time of every submission file waiting in the input and competition folders."""
+        patterns = [os.path.join(CONFIG.ZindiCompetetionFilesPath.submission_file_folder, "*.csv"),
+                    os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder, "*", "*.csv")]
+        snapshot = {}
+        for pattern in patterns:
+            for path in glob.glob(str(pattern)):
+                try:
+                    snapshot[path] = os.path.getmtime(path)
+                except OSError:  # moved while scanning
+                    pass
+        return snapshot
+
+    def watch(self):
+        """submit every file dropped in the submission files folder as soon as it is completely written."""
+        self.preparation_process.get_opened_competetion_names_list_make_dirs(remove_existing=False)
+        upload_queue = queue.Queue()
+
+        def route(file_path):
+            competition, destination_file = \
+                self.preparation_process.submission_files_checks.route_submission_file(file_path)
+            if competition is not None:
+                upload_queue.put((competition, destination_file))
+
+        watcher = SubmissionWatcher(folder=CONFIG.ZindiCompetetionFilesPath.submission_file_folder, on_file=route,
+                                    debounce_seconds=CONFIG.Submissions.watch_debounce_seconds)
+        uploader = threading.Thread(target=self.drain_upload_queue, args=(upload_queue,), name="upload")
+        uploader.start()
+        logger.info(f"Watching {CONFIG.ZindiCompetetionFilesPath.submission_file_folder} for submission files")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.stop()
+        finally:
+            upload_queue.put(None)  # the uploader stops after the queued files
+            uploader.join()
+
+    def drain_upload_queue(self, upload_queue):
+        """upload the routed submission files one by one, until None is queued."""
+        while True:
+            queued = upload_queue.get()
+            if queued is None:
+                return
+            competition, submission_file = queued
+            try:
+                report_row = self.zindi_processing.submit_queued_file(competition, submission_file)
+                logger.info(f"{os.path.basename(submission_file)} : {report_row['Submission status']}")
+            except Exception as e:
+                logger.error(f"Upload of {submission_file} failed : {e}")
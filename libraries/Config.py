@@ -21,7 +21,8 @@ class Configuration:
     class ReportsFiles:
         """Reports of submissions of competitions."""
         reports_columns = ["Competetion Name", "today_remaining_submission", "today_total_submitted",
-         "Best Score", "Best rank", "user name", "Best submission time", "Rank after submission"]
+         "Best Score", "Best rank", "user name", "Best submission time", "Rank after submission",
+         "Submission file", "Submission status", "Submission id", "Submission score"]
 
 
         submission_posted_report = "submission_report.csv"
@@ -30,10 +31,54 @@ class Configuration:
         """List of Credential groups."""
         items_list = ["Phantom Wallet","Zindi_Credential"]
 
+    class ZindiApi:
+        """zindi api connection settings."""
+        pool_size = 10
+        catalog_ttl_seconds = 900
+        catalog_cache_path = Path().cwd() / "temp" / "zindi_catalog.json"
+        leaderboard_max_age_seconds = None
+        rank_page_size = 100
+        requests_per_second = 5
+        competition_workers = 3
+        joined_registry_path = Path().cwd() / "temp" / "zindi_joined.json"
+        download_workers = 4
+        download_segments = 4
+        dataset_store_path = Path().cwd() / "temp" / "dataset_store"
+        dataset_store_max_bytes = 20 * 1024 ** 3
+        extract_archives = True
+        dataset_format = None  # 'parquet' or 'arrow' to convert the downloaded CSV datafiles
+
+    class Submissions:
+        """submission files bookkeeping settings."""
+        ledger_path = Path().cwd() / "temp" / "submission_ledger.json"
+        journal_path = Path().cwd() / "temp" / "submission_journal.jsonl"
+        competition_priorities = {}  # higher first, e.g. {"lacuna-solar-survey-challenge": 2}
+        quota_reset_hour_utc = 0
+        daemon_poll_seconds = 30
+        watch_debounce_seconds = 2
+        score_poll_initial_seconds = 5
+        score_poll_max_seconds = 300
+        score_wait_seconds = 1800
+        pipeline = True  # validate -> upload -> score -> report stages instead of one competition after the other
+        pipeline_queue_size = 8
+        pipeline_validate_workers = 2
+        pipeline_upload_workers = 2
+        # local holdout labels to submit the best-looking files first, the labels file has the submission format
+        # e.g. {"lacuna-solar-survey-challenge": {"path": "Holdout/lacuna-solar-survey-challenge.csv", "metric": "rmse"}}
+        holdout_labels = {}
+        local_metric_chunk_rows = 1_000_000
+        local_metric_workers = 2
+        validate_submissions = True  # against the competition sample submission, before spending a slot
+        sample_submission_folder = Path().cwd() / "temp" / "sample_submissions"
+        sample_submissions = {}  # explicit sample submission path by competition id, downloaded otherwise
+        validation_chunk_rows = 500_000
+        validation_workers = 2
+
     class ZindiCompetetionFilesPath:
         """zindi competetions files paths."""
         competetion_folder = Path().cwd() / "Competitions"
         submission_file_folder = 'SubmissionFilesFolder'
+        submitted_folder = 'submitted'  # sub folder of a competition folder, files with submitted predictions
 
     class INPUTS:
         selected_competetion_names_to_work = [
@@ -0,0 +1,273 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from libraries.logging_file import logger
+
+try:  # multithreaded csv parsing and id matching, pandas chunks are read when it is not installed
+    import pyarrow
+    import pyarrow.compute as pyarrow_compute
+    import pyarrow.csv as pyarrow_csv
+except ImportError:
+    pyarrow = None
+
+LOWER_IS_BETTER = {"rmse": True, "mae": True, "logloss": True, "f1": False, "auc": False, "accuracy": False}
+_EPSILON = 1e-15
+_labels_cache = {}  # holdout labels by (path, modification time), read once per process
+
+
+class MetricEngine:
+    """Score the candidate submission files on local holdout labels, the best-looking files are submitted first."""
+
+    def __init__(self, holdout_labels=None, chunk_rows=1_000_000, workers=1):
+        """Keep the holdout labels settings of every competition.
+
+        Parameters
+        ----------
+        holdout_labels : dictionary, default=None
+            {"path": ..., "metric": ...} by competition id. The labels file has the submission format: the id
+            column first, then the target columns of the submission files. The metric is one of
+            'rmse', 'mae', 'logloss', 'f1', 'auc' or 'accuracy'.
+        chunk_rows : int, default=1_000_000
+            The number of rows read at once from a csv file.
+        workers : int, default=1
+            The number of files scored at the same time, in worker processes started once and kept, so each of
+            them reads the holdout labels once.
+
+        """
+        self.holdout_labels = {} if holdout_labels is None else holdout_labels
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.__executor = None
+        self.__executor_lock = threading.Lock()
+        for competition, holdout in self.holdout_labels.items():
+            if holdout.get("metric") not in LOWER_IS_BETTER:
+                raise Exception(f"\n[ 🔴 ] Unknown metric {holdout.get('metric')} for {competition}, "
+                                f"use one of : {', '.join(LOWER_IS_BETTER)}.\n")
+
+    def can_score(self, competition) -> bool:
+        """Check if the holdout labels of the competition are available."""
+
+        holdout = self.holdout_labels.get(competition)
+        return holdout is not None and os.path.isfile(str(holdout["path"]))
+
+    def score(self, competition, filepath):
+        """Score a submission file on the holdout labels, None if it cannot be scored."""
+
+        holdout = self.holdout_labels[competition]
+        try:
+            return score_file(str(holdout["path"]), holdout["metric"], filepath, self.chunk_rows)
+        except Exception as e:
+            logger.info(f"Local score of {os.path.basename(filepath)} not available: {e}")
+            return None
+
+    def rank(self, competition, filepaths) -> list:
+        """Order the files from the best local score to the worst, the files without score last.
+
+        The files keep their order when the competition has no holdout labels.
+        """
+        if len(filepaths) < 2 or not self.can_score(competition):
+            return list(filepaths)
+        holdout = self.holdout_labels[competition]
+        if self.workers > 1:
+            executor = self.__pool()
+            futures = [executor.submit(score_file, str(holdout["path"]), holdout["metric"], filepath,
+                                       self.chunk_rows) for filepath in filepaths]
+            scores = []
+            for filepath, future in zip(filepaths, futures):
+                try:
+                    scores.append(future.result())
+                except Exception as e:
+                    logger.info(f"Local score of {os.path.basename(filepath)} not available: {e}")
+                    scores.append(None)
+        else:
+            scores = [self.score(competition, filepath) for filepath in filepaths]
+
+        sign = 1 if LOWER_IS_BETTER[holdout["metric"]] else -1
+        ranked = sorted(zip(scores, range(len(filepaths)), filepaths),
+                        key=lambda item: (item[0] is None or np.isnan(item[0]),
+                                          0.0 if item[0] is None or np.isnan(item[0]) else sign * item[0],
+                                          item[1]))
+        logger.info(f"Local {holdout['metric']} of {competition}: " +
+                    ", ".join(f"{os.path.basename(filepath)}={score if score is None else round(score, 6)}"
+                              for score, _, filepath in ranked))
+        return [filepath for _, _, filepath in ranked]
+
+    def __pool(self):
+        """Start the worker processes on the first use, they keep the holdout labels between the competitions."""
+
+        with self.__executor_lock:
+            if self.__executor is None:
+                # spawned, not forked : the files are ranked from threads which may hold locks
+                self.__executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                      mp_context=multiprocessing.get_context("spawn"))
+            return self.__executor
+
+
+## Read the files
+def _read_columns(filepath, columns, chunk_rows, categories=None):
+    """Read the id column and the target columns of a csv file by chunks, streamed by pyarrow when it is installed.
+
+    Returns
+    -------
+    ids : pyarrow array | numpy array
+        The ids, as strings.
+    targets : numpy array
+        The targets as float64, one column per target. A target with categories is read as its category codes,
+        -1 for an unknown category.
+    """
+    categories = {} if categories is None else categories
+    if pyarrow is not None:
+        convert_options = pyarrow_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pyarrow.string() if column == columns[0] or column in categories
+                          else pyarrow.float64() for column in columns})
+        table = pyarrow_csv.open_csv(filepath, convert_options=convert_options).read_all()
+        ids = table.column(columns[0]).combine_chunks()
+        chunks = [table.select(columns[1:]).to_pandas()]
+    else:
+        ids, chunks = [], []
+        for chunk in pd.read_csv(filepath, usecols=columns, dtype={columns[0]: str}, chunksize=chunk_rows):
+            ids.append(chunk[columns[0]].to_numpy())
+            chunks.append(chunk)
+        ids = np.concatenate(ids) if ids else np.empty(0, dtype=object)
+
+    targets = []
+    for chunk in chunks:
+        values = np.empty((len(chunk), len(columns) - 1), dtype=np.float64)
+        for i, column in enumerate(columns[1:]):
+            if column in categories:
+                values[:, i] = pd.Categorical(chunk[column], categories=categories[column]).codes
+            else:
+                values[:, i] = pd.to_numeric(chunk[column], errors="coerce")
+        targets.append(values)
+    return ids, np.concatenate(targets) if targets else np.empty((0, len(columns) - 1), dtype=np.float64)
+
+
+def _positions(labels, ids) -> np.ndarray:
+    """Get the row of every id in the holdout labels, -1 for an unknown id."""
+
+    label_ids = labels["ids"]
+    if len(ids) == len(label_ids):  # the ids in the labels order, the usual sample submission order
+        same_order = pyarrow_compute.all(pyarrow_compute.equal(ids, label_ids), skip_nulls=False).as_py() \
+            if pyarrow is not None else np.array_equal(ids, label_ids)
+        if same_order:
+            return np.arange(len(ids))
+    if pyarrow is not None:
+        positions = pyarrow_compute.index_in(ids, value_set=label_ids)
+        return pyarrow_compute.fill_null(positions, -1).to_numpy()
+    return pd.Index(label_ids).get_indexer(ids)
+
+
+def _load_labels(path, chunk_rows) -> dict:
+    """Read the holdout labels once per process, they are read again when the file changes."""
+
+    key = (path, os.path.getmtime(path))
+    if key not in _labels_cache:
+        columns = list(pd.read_csv(path, nrows=0).columns)
+        sample = pd.read_csv(path, usecols=columns[1:], nrows=1000)
+        categories = {column: pd.unique(pd.read_csv(path, usecols=[column])[column].dropna())
+                      for column in columns[1:] if not pd.api.types.is_numeric_dtype(sample[column])}
+        ids, targets = _read_columns(path, columns, chunk_rows, categories)
+        _labels_cache.clear()
+        _labels_cache[key] = {"columns": columns, "categories": categories, "ids": ids, "targets": targets,
+                              # a numeric 0/1 column, scored with the 0.5 threshold and the positive class 1
+                              "binary": not categories and targets.shape[1] == 1 and np.isin(targets, [0, 1]).all()}
+    return _labels_cache[key]
+
+
+def score_file(labels_path, metric, filepath, chunk_rows=1_000_000) -> float:
+    """Compute the metric of a submission file on the holdout labels, the rows are matched by id.
+
+    The ids of the submission which are not in the labels are ignored, a missing id or a missing prediction
+    raises a ValueError.
+    """
+    labels = _load_labels(labels_path, chunk_rows)
+    columns = list(pd.read_csv(filepath, nrows=0).columns)
+    missing = [column for column in labels["columns"][1:] if column not in columns]
+    if missing:
+        raise ValueError(f"missing column(s) {missing}")
+    ids, values = _read_columns(filepath, [columns[0]] + labels["columns"][1:], chunk_rows, labels["categories"])
+
+    positions = _positions(labels, ids)
+    known = positions >= 0
+    predictions = np.full(labels["targets"].shape, np.nan)
+    predictions[positions[known]] = values[known]
+    n_missing = int(np.isnan(predictions).any(axis=1).sum())
+    if n_missing:
+        raise ValueError(f"{n_missing} holdout id(s) without prediction")
+    return float(METRICS[metric](labels["targets"], predictions, labels["binary"]))
+
+
+## Metrics, on (rows, targets) arrays
+def _rmse(y, p, binary):
+    return np.sqrt(np.mean((y - p) ** 2))
+
+
+def _mae(y, p, binary):
+    return np.mean(np.abs(y - p))
+
+
+def _logloss(y, p, binary):
+    if y.shape[1] == 1:  # binary, the probability of the positive class
+        p = np.clip(p[:, 0], _EPSILON, 1 - _EPSILON)
+        return -np.mean(y[:, 0] * np.log(p) + (1 - y[:, 0]) * np.log(1 - p))
+    p = np.clip(p / p.sum(axis=1, keepdims=True), _EPSILON, 1)  # multiclass, one hot labels
+    return -np.mean(np.sum(y * np.log(p), axis=1))
+
+
+def _classes(y, p, binary):
+    """Get the true and predicted classes: the argmax of one hot columns, or the 0.5 threshold of a binary column."""
+
+    if y.shape[1] > 1:
+        return np.argmax(y, axis=1), np.argmax(p, axis=1)
+    if binary:
+        return y[:, 0], (p[:, 0] >= 0.5).astype(np.float64)
+    return y[:, 0], p[:, 0]
+
+
+def _accuracy(y, p, binary):
+    y, p = _classes(y, p, binary)
+    return np.mean(y == p)
+
+
+def _f1(y, p, binary):
+    """F1 of the positive class for binary labels, the macro F1 otherwise."""
+
+    y, p = _classes(y, p, binary)
+    classes, codes = np.unique(np.concatenate([y, p]), return_inverse=True)
+    y_codes, p_codes = codes[:len(y)], codes[len(y):]
+    confusion = np.bincount(y_codes * len(classes) + p_codes, minlength=len(classes) ** 2)
+    confusion = confusion.reshape(len(classes), len(classes))
+    true_positives = np.diag(confusion).astype(np.float64)
+    denominators = confusion.sum(axis=0) + confusion.sum(axis=1)  # predicted + actual
+    f1 = np.divide(2 * true_positives, denominators, out=np.zeros_like(true_positives), where=denominators > 0)
+    if binary:
+        return f1[classes == 1][0] if (classes == 1).any() else 0.0
+    return np.mean(f1[np.isin(classes, y)])
+
+
+def _binary_auc(y, p):
+    """Mann-Whitney AUC, the tied predictions get their average rank."""
+
+    _, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    ranks = ((ends - counts + 1 + ends) / 2.0)[inverse]
+    positives = y == 1
+    n_positives = positives.sum()
+    n_negatives = len(y) - n_positives
+    if n_positives == 0 or n_negatives == 0:
+        return np.nan
+    return (ranks[positives].sum() - n_positives * (n_positives + 1) / 2) / (n_positives * n_negatives)
+
+
+def _auc(y, p, binary):
+    """AUC of a binary column, the one-vs-rest macro AUC of one hot columns."""
+
+    return np.nanmean([_binary_auc(y[:, i], p[:, i]) for i in range(y.shape[1])])
+
+
+METRICS = {"rmse": _rmse, "mae": _mae, "logloss": _logloss, "f1": _f1, "auc": _auc, "accuracy": _accuracy}
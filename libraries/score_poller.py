@@ -0,0 +1,143 @@
+import heapq
+import random
+import threading
+import time
+
+from libraries.logging_file import logger
+
+
+class ScorePoller:
+    """Background poller of the scores of the fresh submissions, with exponential backoff and jitter."""
+
+    def __init__(self, zindi_user, on_scored, user_name_for_rank="", initial_delay=5.0, max_delay=300.0,
+                 max_wait=3600.0):
+        """Keep the user and the polling settings, the polling thread starts with the first tracked submission.
+
+        Parameters
+        ----------
+        zindi_user : Zindian
+            The signed in user.
+        on_scored : callable
+            Called with the submission id, the final score, the rank after scoring and the submission status.
+        user_name_for_rank : string, default=""
+            The username, or "TEAM - {title}", looked up on the leaderboard after scoring.
+        initial_delay : float, default=5.0
+            The number of seconds before the first check of a submission, doubled after each check.
+        max_delay : float, default=300.0
+            The maximum number of seconds between two checks of a submission.
+        max_wait : float, default=3600.0
+            The number of seconds after which a submission still in processing is given up.
+
+        """
+        self.user = zindi_user
+        self.on_scored = on_scored
+        self.user_name_for_rank = user_name_for_rank
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.__queue = []  # (next check time, competition, submission id, attempt, tracked at)
+        self.__condition = threading.Condition()
+        self.__running = False  # the polling thread is alive
+        self.__in_flight = 0  # submissions being checked, out of the queue
+
+    def track(self, competition, submission_id) -> None:
+        """Poll the score of a submission in the background, the caller does not wait."""
+
+        now = time.monotonic()
+        with self.__condition:
+            heapq.heappush(self.__queue, (now + self.initial_delay, competition, submission_id, 0, now))
+            if not self.__running:
+                self.__running = True
+                threading.Thread(target=self.__run, name="score-poller", daemon=True).start()
+            self.__condition.notify()
+
+    def wait(self, timeout=None) -> bool:
+        """Wait until every tracked submission is scored or given up, return False on timeout."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__condition:
+            while self.__queue or self.__in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__condition.wait(remaining)
+        return True
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                if not self.__queue:
+                    self.__running = False
+                    return
+                delay = self.__queue[0][0] - time.monotonic()
+                if delay > 0:
+                    self.__condition.wait(delay)
+                    continue
+                due = []  # every due submission, the board of a competition is downloaded once for all of them
+                while self.__queue and self.__queue[0][0] <= time.monotonic():
+                    due.append(heapq.heappop(self.__queue))
+                self.__in_flight += len(due)
+            competitions = {}
+            for entry in due:
+                competitions.setdefault(entry[1], []).append(entry)
+            for competition, entries in competitions.items():
+                retry = []
+                try:
+                    retry = self.__check(competition, entries)
+                except Exception as e:
+                    logger.error(f"Scores of {competition} not checked: {e}")
+                finally:
+                    with self.__condition:
+                        for entry in retry:
+                            heapq.heappush(self.__queue, entry)
+                        self.__in_flight -= len(entries)
+                        self.__condition.notify_all()
+
+    def __check(self, competition, entries) -> list:
+        """Check the submissions of a competition on its submission board, return the entries to check again."""
+
+        try:
+            challenge = self.user.challenge(competition, join=False)
+            submissions = {submission["id"]: submission for submission in challenge.submission_board(to_print=False)}
+        except Exception as e:
+            logger.info(f"Submission board of {competition} not available: {e}")
+            submissions = {}
+        retry = []
+        rank, rank_looked_up = None, False
+        for next_check, _, submission_id, attempt, tracked_at in entries:
+            submission = submissions.get(submission_id)
+            if submission is not None and submission["status"] not in ["successful", "initial"]:
+                self.__notify(submission_id, None, None, submission.get("status_description") or "failed")
+                continue
+            score = None
+            if submission is not None:
+                score = submission["private_score"] if "private_score" in submission else submission["public_score"]
+            if score is not None:
+                if not rank_looked_up:  # the leaderboard snapshot is outdated by the submission, downloaded once here
+                    rank_looked_up = True
+                    try:
+                        rank = self.__fresh_rank(challenge)
+                    except Exception as e:
+                        logger.info(f"Rank after scoring on {competition} not available: {e}")
+                self.__notify(submission_id, score, rank, "scored")
+            elif time.monotonic() - tracked_at >= self.max_wait:
+                self.__notify(submission_id, None, None, "score still in processing")
+            else:
+                delay = min(self.max_delay, self.initial_delay * 2 ** (attempt + 1))
+                delay *= random.uniform(0.5, 1.5)  # jitter, the submissions of a batch are not checked in step
+                retry.append((time.monotonic() + delay, competition, submission_id, attempt + 1, tracked_at))
+        return retry
+
+    def __fresh_rank(self, challenge) -> int:
+        """Look up the rank on the live leaderboard, never on a snapshot taken before the score existed."""
+
+        if self.user.rank_page_size and isinstance(self.user_name_for_rank, str):
+            return challenge.rank_paged(self.user_name_for_rank)
+        challenge.leaderboard_snapshot(refresh=True)
+        return challenge.leaderboard(user_name_for_rank=self.user_name_for_rank, to_print=False)
+
+    def __notify(self, submission_id, score, rank, status):
+        try:
+            self.on_scored(submission_id, score, rank, status)
+        except Exception as e:
+            logger.error(f"Score of submission {submission_id} not reported: {e}")
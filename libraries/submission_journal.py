@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from libraries.logging_file import logger
+
+
+class SubmissionJournal:
+    """Append-only write-ahead journal of the submission intents and outcomes, fsync'd at every record."""
+
+    def __init__(self, path=None):
+        """Replay the journal written by the previous runs.
+
+        Parameters
+        ----------
+        path : string, default=None
+            The jsonl file of the journal, memory only if None.
+
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__intents = {}  # intent record by intent id, until its outcome is written
+        self.__confirmed = set()  # (competition, content hash) of the confirmed submissions
+        self.__torn = False  # the last line was cut by a crash
+        self.__running = set()  # ids of the intents written by this run, their upload may still be running
+        self.__replay()
+
+    def intent(self, competition, submission_file, content_hash) -> str:
+        """Write that a file is about to be uploaded, before the upload starts.
+
+        Returns
+        -------
+        intent_id : string
+            The id to give to the outcome of the upload.
+        """
+        record = {
+            "event": "intent",
+            "id": uuid.uuid4().hex,
+            "competition": competition,
+            "file": os.path.basename(submission_file),
+            "content_hash": content_hash,
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.__append(record)
+        with self.__lock:
+            self.__running.add(record["id"])
+        return record["id"]
+
+    def outcome(self, intent_id, status, submission_id=None) -> None:
+        """Write the outcome of an upload: "submitted", "failed" or "interrupted" by a crash."""
+
+        self.__append({
+            "event": "outcome",
+            "id": intent_id,
+            "status": status,
+            "submission_id": submission_id,
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+    def confirmed(self, competition, content_hash) -> bool:
+        """Check if the journal confirms the upload of these predictions to the competition."""
+
+        with self.__lock:
+            return (competition, content_hash) in self.__confirmed
+
+    def pending(self, competition=None) -> list:
+        """Get the intents of the previous runs without outcome, i.e. the uploads interrupted by a crash."""
+
+        with self.__lock:
+            return [record for record in self.__intents.values()
+                    if record["id"] not in self.__running
+                    and (competition is None or record["competition"] == competition)]
+
+    def resume(self, competition, ledger) -> int:
+        """Close the interrupted uploads of a competition, once the ledger is reconciled with the submission board.
+
+        An interrupted upload found on the submission board is confirmed, the others are marked interrupted
+        so their file is uploaded again.
+
+        Returns
+        -------
+        n_recovered : int
+            The number of interrupted uploads found on the submission board.
+        """
+        n_recovered = 0
+        for record in self.pending(competition):
+            if ledger.duplicate_of(competition, record["content_hash"]) is not None:
+                self.outcome(record["id"], "submitted")
+                n_recovered += 1
+            else:
+                self.outcome(record["id"], "interrupted")
+                logger.info(f"Upload of {record['file']} was interrupted, it will be submitted again")
+        return n_recovered
+
+    def __apply(self, record):
+        if record["event"] == "intent":
+            self.__intents[record["id"]] = record
+        else:
+            intent = self.__intents.pop(record["id"], None)
+            if intent is not None and record["status"] == "submitted":
+                self.__confirmed.add((intent["competition"], intent["content_hash"]))
+
+    def __append(self, record):
+        """Apply a record, then write it and flush it to the disk before returning."""
+
+        with self.__lock:
+            self.__apply(record)
+            if not self.path:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a") as journal_file:
+                if self.__torn:
+                    journal_file.write("\n")
+                    self.__torn = False
+                journal_file.write(json.dumps(record) + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+    def __replay(self):
+        """Read the journal, a last line cut by a crash is ignored."""
+
+        if not self.path or not os.path.isfile(self.path):
+            return
+        with open(self.path, "r") as journal_file:
+            for line in journal_file:
+                self.__torn = not line.endswith("\n")
+                try:
+                    self.__apply(json.loads(line))
+                except (ValueError, KeyError):
+                    logger.info(f"Ignoring a torn record of the submission journal {self.path}")
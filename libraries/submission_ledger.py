@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from libraries.logging_file import logger
+
+
+class SubmissionLedger:
+    """Ledger of the files submitted per competition, keyed by a content hash of the predictions."""
+
+    def __init__(self, path=None):
+        """Load the submissions recorded by the previous runs.
+
+        Parameters
+        ----------
+        path : string, default=None
+            The json file of the ledger, memory only if None.
+
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__ledger = self.__load()  # {competition id: {content hash: submission record}}
+
+    @staticmethod
+    def content_hash(filepath) -> str:
+        """Hash the predictions of a submission file, whatever the row order and the float formatting.
+
+        The numeric columns are compared as float64 rounded to 9 decimals, so "0.5", "0.50" and "5e-1"
+        give the same hash, and the rows are sorted before hashing.
+        """
+        frame = pd.read_csv(filepath)
+        for column in frame.columns:
+            if pd.api.types.is_numeric_dtype(frame[column]):
+                frame[column] = frame[column].astype(np.float64).round(9)
+        frame = frame.sort_values(by=list(frame.columns), kind="mergesort", ignore_index=True)
+        digest = hashlib.sha256("\x1f".join(map(str, frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def duplicate_of(self, competition_id, content_hash):
+        """Get the filename already submitted with the same predictions, None if they are new."""
+
+        with self.__lock:
+            record = self.__ledger.get(competition_id, {}).get(content_hash)
+        return None if record is None else record["filename"]
+
+    def record(self, competition_id, content_hash, filename, submission_id=None):
+        """Record a submitted file in the ledger."""
+
+        with self.__lock:
+            self.__ledger.setdefault(competition_id, {})[content_hash] = {
+                "filename": filename,
+                "submission_id": submission_id,
+                "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self.__save()
+
+    def reconcile(self, competition_id, submissions_data, competition_directory):
+        """Record the local files found on the submission board but missing in the ledger.
+
+        Parameters
+        ----------
+        competition_id : string
+            The id of the competition.
+        submissions_data : list
+            The submissions of the user, as returned by the submission board.
+        competition_directory : string
+            The folder of the competition submission files.
+
+        Returns
+        -------
+        n_reconciled : int
+            The number of submissions added to the ledger.
+        """
+        with self.__lock:
+            known = {os.path.basename(record["filename"]) for record in self.__ledger.get(competition_id, {}).values()}
+        n_reconciled = 0
+        for submission in submissions_data:
+            # the board can echo the uploaded name "{competition}/{file}.csv", the ledger keeps the file name
+            filename = os.path.basename(str(submission.get("filename")))
+            filepath = os.path.join(str(competition_directory), filename)
+            if submission.get("status") not in ["successful", "initial"] or filename in known:
+                continue
+            if not os.path.isfile(filepath):
+                continue
+            try:
+                self.record(competition_id, self.content_hash(filepath), filename, submission.get("id"))
+                known.add(filename)
+                n_reconciled += 1
+            except Exception as e:
+                logger.info(f"Submission {filename} not reconciled with the ledger: {e}")
+        return n_reconciled
+
+    def __load(self):
+        """Read the persisted ledger."""
+
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as ledger_file:
+                return json.load(ledger_file)
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable submission ledger {self.path}: {e}")
+            return {}
+
+    def __save(self):
+        """Persist the ledger, replacing the file atomically."""
+
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as ledger_file:
+            json.dump(self.__ledger, ledger_file, indent=2)
+        os.replace(temporary_path, self.path)
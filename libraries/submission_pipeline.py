@@ -0,0 +1,220 @@
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from libraries.logging_file import logger
+from libraries.submission_ledger import SubmissionLedger
+from libraries.submission_validator import validate_file
+
+_STOP = object()  # end of a stage input
+
+
+class SubmissionPipeline:
+    """Validate -> upload -> score -> report stages connected by bounded queues, each with its own workers.
+
+    A full queue blocks the stage before it, so a slow upload slows down the validation instead of piling up files
+    in memory, while the other competitions keep flowing. The uploaded files are scored by the score poller of the
+    processing, which attaches the scores to their report rows.
+    """
+
+    def __init__(self, zindi_processing, queue_size=8, validate_workers=2, upload_workers=2):
+        """Start the workers of every stage.
+
+        Parameters
+        ----------
+        zindi_processing : ZindiProcessing
+            The processing holding the user, the ledger, the journal, the scheduler, the score poller and the
+            report.
+        queue_size : int, default=8
+            The maximum number of files waiting between two stages.
+        validate_workers : int, default=2
+            The number of files validated and hashed at the same time, in worker processes.
+        upload_workers : int, default=2
+            The number of files uploaded at the same time.
+
+        """
+        self.processing = zindi_processing
+        self.__validate_queue = queue.Queue(maxsize=queue_size)
+        self.__upload_queue = queue.Queue(maxsize=queue_size)
+        self.__report_queue = queue.Queue(maxsize=queue_size)
+        self.__lock = threading.Lock()
+        self.__competitions = {}  # challenge, limits and leaderboard row by competition, read once
+        self.__competition_locks = {}  # a slow competition only blocks its own files
+        self.__claimed = {}  # filename by (competition, content hash) of the files passed to the upload stage
+        # spawned, not forked : the stages, the score poller and the http pool threads may hold locks when the
+        # first file is validated
+        self.__hash_pool = ProcessPoolExecutor(max_workers=validate_workers,
+                                               mp_context=multiprocessing.get_context("spawn"))
+        self.__validators = self.__start(self.__validate, validate_workers, "validate")
+        self.__uploaders = self.__start(self.__upload, upload_workers, "upload")
+        self.__reporters = self.__start(self.__report, 1, "report")  # the report has a single writer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def put(self, competition, submission_file) -> None:
+        """Queue a submission file, blocks while the validation stage is full."""
+
+        self.__validate_queue.put((competition, submission_file))
+
+    def close(self) -> None:
+        """Let every queued file go through all the stages, then stop the workers, the scores keep coming to the
+        score poller of the processing."""
+
+        self.__stop(self.__validate_queue, self.__validators)
+        self.__stop(self.__upload_queue, self.__uploaders)
+        self.__hash_pool.shutdown()
+        self.__stop(self.__report_queue, self.__reporters)
+
+    @staticmethod
+    def __start(target, n_workers, name):
+        workers = [threading.Thread(target=target, name=f"{name}-{i}") for i in range(max(1, n_workers))]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    @staticmethod
+    def __stop(stage_queue, workers):
+        for _ in workers:
+            stage_queue.put(_STOP)
+        for worker in workers:
+            worker.join()
+
+    def competition(self, competition) -> dict:
+        """Get the challenge, its limits, the user leaderboard row and the sample submission, read once and shared
+        by the stages and the competition processing, the submissions are resumed once."""
+
+        with self.__lock:
+            competition_lock = self.__competition_locks.setdefault(competition, threading.Lock())
+        with competition_lock:
+            state = self.__competitions.get(competition)
+            if state is None:
+                challenge = self.processing.user.challenge(competition)
+                self.processing.resume_submissions(challenge)
+                state = {
+                    "challenge": challenge,
+                    "limits": challenge.submission_limits(),
+                    "leader_board_data": self.processing.leader_board_row(challenge),
+                    "sample_submission": None if self.processing.validator is None
+                    else self.processing.validator.sample_submission(challenge),
+                }
+                self.__competitions[competition] = state
+            return state
+
+    ## Stages
+    def __validate(self):
+        """Validate and hash the predictions in a worker process, drop the invalid files and the files already
+        submitted, a file which cannot be validated is reported failed."""
+
+        while True:
+            queued = self.__validate_queue.get()
+            if queued is _STOP:
+                return
+            pending = [queued]
+            while pending:
+                competition, submission_file = pending.pop()
+                try:
+                    self.__validate_file(competition, submission_file, pending)
+                except Exception as e:
+                    logger.error(f"Validation of {submission_file} failed: {e}")
+                    self.__skip(competition, submission_file, f"failed: {e}", pending)
+
+    def __validate_file(self, competition, submission_file, pending):
+        state = self.competition(competition)
+        problems = [] if state["sample_submission"] is None else self.__hash_pool.submit(
+            validate_file, state["sample_submission"], submission_file,
+            self.processing.validator.chunk_rows).result()
+        if problems:
+            logger.info(f"Skipping {submission_file}, invalid: {'; '.join(problems)}")
+            self.__skip(competition, submission_file, f"invalid: {'; '.join(problems)}", pending)
+            return
+        content_hash = self.__hash_pool.submit(SubmissionLedger.content_hash, submission_file).result()
+        duplicate_of = self.processing.ledger.duplicate_of(competition, content_hash)
+        if duplicate_of is None and self.processing.journal.confirmed(competition, content_hash):
+            duplicate_of = "a confirmed submission of the journal"
+        confirmed = duplicate_of is not None  # not only claimed by an upload of this run, which can still fail
+        if duplicate_of is None:
+            with self.__lock:  # the same predictions validated at the same time are uploaded once
+                duplicate_of = self.__claimed.setdefault((competition, content_hash),
+                                                         os.path.basename(submission_file))
+            if duplicate_of == os.path.basename(submission_file):
+                duplicate_of = None
+        if duplicate_of is None:
+            self.__upload_queue.put((competition, submission_file, content_hash))
+            return
+        logger.info(f"Skipping {submission_file}, same predictions as the submitted {duplicate_of}")
+        if confirmed:
+            self.processing.archive_submitted_file(competition, submission_file)
+        self.__skip(competition, submission_file, f"duplicate of {duplicate_of}", pending)
+
+    def __skip(self, competition, submission_file, status, pending):
+        """Report a file not uploaded, its slot goes to the first deferred file."""
+
+        self.__report_queue.put(self.__report_row(competition, submission_file, status))
+        if self.processing.scheduler is not None:
+            released = self.processing.scheduler.release(competition)
+            if released is not None:
+                pending.append((competition, released))
+
+    def __report_row(self, competition, submission_file, status, submission_id=None) -> dict:
+        """Build a report row from the last limits read, without limits nor leaderboard row if they are missing."""
+
+        state = self.__competitions.get(competition) or {}
+        return self.processing.report_row(competition, state.get("limits"), state.get("leader_board_data"), None,
+                                          submission_file, status, submission_id)
+
+    def __upload(self):
+        """Upload the files between a journal intent and its outcome, then hand them to the score poller, a file
+        which cannot be uploaded is reported failed."""
+
+        while True:
+            queued = self.__upload_queue.get()
+            if queued is _STOP:
+                return
+            competition, submission_file, content_hash = queued
+            try:
+                self.__upload_file(competition, submission_file, content_hash)
+            except Exception as e:
+                logger.error(f"Upload of {submission_file} failed: {e}")
+                self.__report_queue.put(self.__report_row(competition, submission_file, f"failed: {e}"))
+
+    def __upload_file(self, competition, submission_file, content_hash):
+        state = self.competition(competition)
+        challenge = state["challenge"]
+        intent_id = self.processing.journal.intent(competition, submission_file, content_hash)
+        try:
+            submission_id = challenge.submit(filepaths=[submission_file], comments=['API  submission'])[0]
+        except Exception as e:
+            logger.error(f"Upload of {submission_file} failed: {e}")
+            submission_id = None
+        self.processing.journal.outcome(intent_id, "submitted" if submission_id is not None else "failed",
+                                        submission_id)
+        if submission_id is None:
+            self.__report_queue.put(self.__report_row(competition, submission_file, "failed"))
+            return
+        self.processing.ledger.record(competition, content_hash, os.path.basename(submission_file), submission_id)
+        self.processing.archive_submitted_file(competition, submission_file)
+        self.processing.score_poller.track(competition, submission_id)  # the score is attached to the report row
+        limits = challenge.submission_limits()  # the remaining submissions after this upload
+        with self.__lock:
+            if limits:
+                state["limits"] = limits
+            report_row = self.__report_row(competition, submission_file, "submitted", submission_id)
+        self.__report_queue.put(report_row)
+
+    def __report(self):
+        """Write the report rows as they come."""
+
+        while True:
+            report_row = self.__report_queue.get()
+            if report_row is _STOP:
+                return
+            try:
+                self.processing.append_report_rows([report_row])
+            except Exception as e:
+                logger.error(f"Report row of {report_row.get('Submission file')} not written: {e}")
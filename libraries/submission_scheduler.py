@@ -0,0 +1,130 @@
+import datetime
+import heapq
+import os
+import threading
+
+import pandas as pd
+from libraries.Config import CONFIG
+from libraries.logging_file import logger
+
+
+class SubmissionScheduler:
+    """Plan the submission files of every selected competition within its daily submission quota."""
+
+    def __init__(self, zindi_user, priorities=None, reset_hour_utc=0, metric_engine=None):
+        """Keep the user and the scheduling preferences.
+
+        Parameters
+        ----------
+        zindi_user : Zindian
+            The signed in user.
+        priorities : dictionary, default=None
+            The user priority by competition id, a higher priority is submitted first, 0 if absent.
+        reset_hour_utc : int, default=0
+            The UTC hour when the daily submission quotas are reset.
+        metric_engine : MetricEngine, default=None
+            The local scoring of the files, the files of a competition with holdout labels are planned from the
+            best local score to the worst instead of in name order.
+
+        """
+        self.user = zindi_user
+        self.priorities = {} if priorities is None else priorities
+        self.reset_hour_utc = reset_hour_utc
+        self.metric_engine = metric_engine
+        self.quotas = {}  # submissions left today by competition id
+        self.__scheduled = {}  # files to submit today by competition id
+        self.__deferred = {}  # files waiting for the next quota reset by competition id
+        self.__lock = threading.Lock()
+
+    @property
+    def next_reset(self) -> datetime.datetime:
+        """Property: Get the UTC time of the next daily quota reset."""
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        reset = now.replace(hour=self.reset_hour_utc, minute=0, second=0, microsecond=0)
+        return reset if reset > now else reset + datetime.timedelta(days=1)
+
+    def plan(self, selected_competition_list: list) -> list:
+        """Read the quota of every competition, then split its pending files between today and the next reset.
+
+        The files are taken from a priority queue ordered by competition deadline, user priority, quota left and
+        local score, each competition gets at most its quota left of files today, the others are deferred.
+
+        Returns
+        -------
+        competitions : list
+            The competitions with submissions left today, the most urgent first.
+        """
+        queue = []
+        for competition in selected_competition_list:
+            challenge = self.user.challenge(competition, join=False)
+            limits = challenge.submission_limits()
+            quota = 0 if limits is None else int(limits["data"]["today"])
+            self.quotas[competition] = quota
+            deadline = pd.to_datetime(challenge.data.get("end_time"), utc=True, errors="coerce")
+            deadline = float("inf") if pd.isna(deadline) else deadline.timestamp()
+            pending_files = self.pending_files(competition)
+            if self.metric_engine is not None:
+                pending_files = self.metric_engine.rank(competition, pending_files)
+            for order, filepath in enumerate(pending_files):
+                key = (deadline, -self.priorities.get(competition, 0), -quota, competition, order)
+                heapq.heappush(queue, (key, filepath))
+
+        ordered = []
+        self.__scheduled = {competition: [] for competition in selected_competition_list}
+        self.__deferred = {competition: [] for competition in selected_competition_list}
+        while queue:
+            (_, _, _, competition, _), filepath = heapq.heappop(queue)
+            if competition not in ordered:
+                ordered.append(competition)
+            if len(self.__scheduled[competition]) < self.quotas[competition]:
+                self.__scheduled[competition].append(filepath)
+            else:
+                self.__deferred[competition].append(filepath)
+
+        for competition in selected_competition_list:
+            if competition not in ordered:  # no pending file, still processed for its rank and report
+                ordered.append(competition)
+            if self.__deferred[competition]:
+                logger.info(f"{len(self.__deferred[competition])} file(s) of {competition} deferred to "
+                            f"the quota reset of {self.next_reset:%d %B %Y, %H:%M} UTC")
+        return [competition for competition in ordered if self.quotas[competition] > 0]
+
+    @staticmethod
+    def pending_files(competition) -> list:
+        """Get the submission files waiting in the competition folder, in name order."""
+
+        competition_directory = os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder, competition)
+        if not os.path.isdir(competition_directory):
+            return []
+        return [os.path.join(str(competition_directory), f)
+                for f in sorted(os.listdir(str(competition_directory))) if f.endswith(".csv")]
+
+    def scheduled(self, competition) -> list:
+        """Get the files planned for today, all the pending files if the competition has not been planned."""
+
+        with self.__lock:
+            if competition not in self.__scheduled:
+                return self.pending_files(competition)
+            return list(self.__scheduled[competition])
+
+    def deferred(self, competition) -> list:
+        """Get the files deferred to the next quota reset."""
+
+        with self.__lock:
+            return list(self.__deferred.get(competition, []))
+
+    def release(self, competition):
+        """Give back the slot of a planned file not submitted, e.g. a duplicate, to the first deferred file.
+
+        Returns
+        -------
+        filepath : string | None
+            The deferred file now planned for today, None if no file is deferred.
+        """
+        with self.__lock:
+            if not self.__deferred.get(competition):
+                return None
+            filepath = self.__deferred[competition].pop(0)
+            self.__scheduled[competition].append(filepath)
+            return filepath
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from libraries.logging_file import logger
+
+try:  # multithreaded csv parsing by record batches, pandas chunks are read when it is not installed
+    import pyarrow
+    import pyarrow.csv as pyarrow_csv
+except ImportError:
+    pyarrow = None
+
+SAMPLE_SUBMISSION_PATTERNS = ["*sample*.csv"]
+_profiles = {}  # sample submission profile by (path, modification time), scanned once per process
+
+
+class SubmissionValidator:
+    """Check the submission files against the sample submission of their competition before spending a slot."""
+
+    def __init__(self, sample_folder, sample_submissions=None, chunk_rows=500_000, workers=2):
+        """Keep where the sample submissions are found.
+
+        Parameters
+        ----------
+        sample_folder : string
+            The folder of the sample submissions, one sub folder by competition id. A missing sample submission is
+            downloaded there from the competition dataset.
+        sample_submissions : dictionary, default=None
+            The sample submission path by competition id, overrides the sample folder.
+        chunk_rows : int, default=500_000
+            The number of rows read at once without pyarrow.
+        workers : int, default=2
+            The number of files validated at the same time, in worker processes started once and kept, so each
+            of them scans a sample submission once.
+
+        """
+        self.sample_folder = str(sample_folder)
+        self.sample_submissions = {} if sample_submissions is None else dict(sample_submissions)
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.__executor = None
+        self.__executor_lock = threading.Lock()
+
+    def sample_submission(self, challenge):
+        """Get the sample submission of the challenge, downloaded once if missing, None if there is none."""
+
+        if challenge.id in self.sample_submissions:
+            return self.sample_submissions[challenge.id]
+        destination = os.path.join(self.sample_folder, challenge.id)
+        sample_path = self.__find_sample(destination)
+        if sample_path is None:
+            try:
+                challenge.download_dataset(destination=destination, filenames=SAMPLE_SUBMISSION_PATTERNS)
+                sample_path = self.__find_sample(destination)
+            except Exception as e:
+                logger.info(f"Sample submission of {challenge.id} not downloaded: {e}")
+        if sample_path is None:
+            logger.info(f"No sample submission for {challenge.id}, its submission files are not validated")
+        self.sample_submissions[challenge.id] = sample_path
+        return sample_path
+
+    def validate(self, challenge, filepath) -> list:
+        """Validate one submission file, return its problems, empty when it is valid or cannot be checked."""
+
+        sample_path = self.sample_submission(challenge)
+        if sample_path is None:
+            return []
+        return validate_file(sample_path, filepath, self.chunk_rows)
+
+    def validate_files(self, challenge, filepaths) -> dict:
+        """Validate the submission files of a challenge in a process pool, return their problems by path."""
+
+        sample_path = self.sample_submission(challenge)
+        if sample_path is None or not filepaths:
+            return {filepath: [] for filepath in filepaths}
+        if self.workers <= 1 or len(filepaths) == 1:
+            return {filepath: validate_file(sample_path, filepath, self.chunk_rows) for filepath in filepaths}
+        executor = self.__pool()
+        futures = {filepath: executor.submit(validate_file, sample_path, filepath, self.chunk_rows)
+                   for filepath in filepaths}
+        return {filepath: future.result() for filepath, future in futures.items()}
+
+    def __pool(self):
+        """Start the worker processes on the first use, they keep the sample submission profiles between the
+        competitions."""
+
+        with self.__executor_lock:
+            if self.__executor is None:
+                # spawned, not forked : the competitions are validated from threads which may hold locks
+                self.__executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                      mp_context=multiprocessing.get_context("spawn"))
+            return self.__executor
+
+    @staticmethod
+    def __find_sample(destination):
+        """Find the sample submission csv in a downloaded dataset folder, the extracted archives included."""
+
+        if not os.path.isdir(destination):
+            return None
+        for folder, _, filenames in sorted(os.walk(destination)):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(".csv") and "sample" in filename.lower():
+                    return os.path.join(folder, filename)
+        return None
+
+
+## Validate a file
+def validate_file(sample_path, filepath, chunk_rows=500_000) -> list:
+    """Compare a submission file with the sample submission without loading it: column names and order, row count,
+    ID set, numeric values, missing and infinite values.
+
+    Returns
+    -------
+    problems : list
+        The problems found, empty when the file is valid.
+    """
+    sample = _sample_profile(sample_path, chunk_rows)
+    columns = sample["columns"]
+    try:
+        header = list(pd.read_csv(filepath, nrows=0).columns)
+    except Exception as e:
+        return [f"unreadable csv: {e}"]
+    problems = []
+    if header != columns:
+        problems.append(f"columns {header} instead of {columns}")
+        if set(columns) - set(header):  # the missing columns cannot be checked
+            return problems
+    try:
+        stats = _scan(filepath, columns, sample["numeric"], chunk_rows)
+    except Exception as e:  # e.g. a text value in a numeric column, reported by pyarrow with its row
+        return problems + [f"unparseable values: {str(e).splitlines()[0]}"]
+
+    if stats["rows"] != sample["stats"]["rows"]:
+        problems.append(f"{stats['rows']} rows instead of {sample['stats']['rows']}")
+    if stats["null_ids"]:
+        problems.append(f"{stats['null_ids']} empty {columns[0]}(s)")
+    if stats["ids"] != sample["stats"]["ids"]:
+        problems.append(f"the {columns[0]}s differ from the sample submission ones (missing, unknown or duplicated)")
+    for column in columns[1:]:
+        for count_name, description in [("non_numeric", "non-numeric"), ("missing", "missing"), ("inf", "infinite")]:
+            if stats[count_name][column]:
+                problems.append(f"{stats[count_name][column]} {description} value(s) in {column}")
+    return problems
+
+
+def _sample_profile(sample_path, chunk_rows) -> dict:
+    """Read the columns, the numeric columns, the row count and the ID set hash of a sample submission once."""
+
+    key = (sample_path, os.path.getmtime(sample_path))
+    if key not in _profiles:
+        columns = list(pd.read_csv(sample_path, nrows=0).columns)
+        head = pd.read_csv(sample_path, usecols=columns[1:], nrows=1000)
+        numeric = {column: pd.api.types.is_numeric_dtype(head[column]) for column in columns[1:]}
+        _profiles[key] = {"columns": columns, "numeric": numeric,
+                          "stats": _scan(sample_path, columns, numeric, chunk_rows)}
+    return _profiles[key]
+
+
+def _scan(filepath, columns, numeric, chunk_rows) -> dict:
+    """Stream a csv file by chunks, memory-mapped, and count its rows, its bad values and hash its ID set.
+
+    The ID set hash is the sum and the xor of the 64 bits hashes of the IDs, whatever the row order.
+    """
+    stats = {"rows": 0, "null_ids": 0, "ids": (0, 0), "non_numeric": dict.fromkeys(columns[1:], 0),
+             "missing": dict.fromkeys(columns[1:], 0), "inf": dict.fromkeys(columns[1:], 0)}
+    id_sum, id_xor = 0, 0
+    for ids, targets in _chunks(filepath, columns, numeric, chunk_rows):
+        stats["rows"] += len(ids)
+        null_ids = pd.isna(ids)
+        stats["null_ids"] += int(null_ids.sum())
+        hashes = pd.util.hash_array(ids[~null_ids].astype(object), categorize=False)
+        id_sum = (id_sum + int(hashes.sum(dtype=np.uint64))) % 2 ** 64
+        id_xor ^= int(np.bitwise_xor.reduce(hashes))
+        for column, values in targets.items():
+            if numeric[column]:
+                parsed = pd.to_numeric(values, errors="coerce")
+                missing = np.isnan(parsed)
+                stats["non_numeric"][column] += int((missing & ~pd.isna(values)).sum())
+                stats["missing"][column] += int(pd.isna(values).sum())
+                stats["inf"][column] += int(np.isinf(parsed).sum())
+            else:
+                stats["missing"][column] += int(pd.isna(values).sum())
+    stats["ids"] = (id_sum, id_xor)
+    return stats
+
+
+def _chunks(filepath, columns, numeric, chunk_rows):
+    """Yield the IDs and the target columns of a csv file, numpy arrays by record batch or by pandas chunk."""
+
+    if pyarrow is not None:
+        convert_options = pyarrow_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={column: pyarrow.float64() if numeric.get(column) else pyarrow.string()
+                          for column in columns})
+        with pyarrow.memory_map(filepath) as source, \
+                pyarrow_csv.open_csv(source, convert_options=convert_options) as reader:
+            for batch in reader:
+                arrays = [column.to_numpy(zero_copy_only=False) for column in batch.columns]
+                yield arrays[0], dict(zip(columns[1:], arrays[1:]))
+        return
+    for chunk in pd.read_csv(filepath, usecols=columns, dtype={columns[0]: str}, chunksize=chunk_rows,
+                             memory_map=True):
+        yield chunk[columns[0]].to_numpy(), {column: chunk[column].to_numpy() for column in columns[1:]}
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+from libraries.logging_file import logger
+
+try:  # kernel notifications on linux, the folder is polled when it is not installed
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+
+class SubmissionWatcher:
+    """Watch the submission files folder and hand every new csv file once it is completely written."""
+
+    def __init__(self, folder, on_file, debounce_seconds=2.0, poll_seconds=1.0):
+        """Keep the folder to watch and the callback of the new files.
+
+        Parameters
+        ----------
+        folder : string
+            The folder where the submission files are dropped.
+        on_file : callable
+            Called with the path of each new csv file, once its size and modification time are stable.
+        debounce_seconds : float, default=2.0
+            The number of seconds a file must stay unchanged before it is handed.
+        poll_seconds : float, default=1.0
+            The number of seconds between two checks of the folder.
+
+        """
+        self.folder = str(folder)
+        self.on_file = on_file
+        self.debounce_seconds = debounce_seconds
+        self.poll_seconds = poll_seconds
+        self.stop_event = threading.Event()
+        self.__candidates = {}  # (size, mtime, time of the last change) by path
+        self.__handed = {}  # (size, mtime) of the files already handed, a rejected file is handed once
+
+    def run(self) -> None:
+        """Watch the folder until stop() is called, the files already in the folder are handed first."""
+
+        os.makedirs(self.folder, exist_ok=True)
+        for file_name in sorted(os.listdir(self.folder)):
+            self.__touch(os.path.join(self.folder, file_name))
+        if inotify_simple is not None:
+            self.__run_inotify()
+        else:
+            logger.info(f"inotify_simple not installed, polling {self.folder} every {self.poll_seconds} s")
+            self.__run_polling()
+
+    def stop(self) -> None:
+        """Stop watching the folder."""
+
+        self.stop_event.set()
+
+    def __run_inotify(self):
+        flags = inotify_simple.flags
+        with inotify_simple.INotify() as inotify:
+            inotify.add_watch(self.folder, flags.CLOSE_WRITE | flags.MOVED_TO | flags.MODIFY | flags.CREATE)
+            while not self.stop_event.is_set():
+                # wake up at least every poll_seconds to hand the debounced files
+                for event in inotify.read(timeout=int(self.poll_seconds * 1000)):
+                    self.__touch(os.path.join(self.folder, event.name))
+                self.__hand_stable_files()
+
+    def __run_polling(self):
+        while not self.stop_event.is_set():
+            for file_name in os.listdir(self.folder):
+                self.__touch(os.path.join(self.folder, file_name))
+            self.__hand_stable_files()
+            self.stop_event.wait(self.poll_seconds)
+
+    def __touch(self, path):
+        """Record a new or changed csv file, a change restarts its debounce delay."""
+
+        if not path.endswith(".csv"):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:  # already moved
+            self.__candidates.pop(path, None)
+            return
+        signature = (stat.st_size, stat.st_mtime)
+        if self.__handed.get(path) == signature:
+            return
+        previous = self.__candidates.get(path)
+        if previous is None or previous[:2] != signature:
+            self.__candidates[path] = (*signature, time.monotonic())
+
+    def __hand_stable_files(self):
+        """Hand the files unchanged for debounce_seconds."""
+
+        now = time.monotonic()
+        for path, (size, mtime, changed_at) in list(self.__candidates.items()):
+            self.__touch(path)  # catch the writes without notification, e.g. on network drives
+            if path not in self.__candidates or self.__candidates[path][2] != changed_at:
+                continue
+            if now - changed_at < self.debounce_seconds or size == 0:
+                continue
+            del self.__candidates[path]
+            self.__handed[path] = (size, mtime)
+            try:
+                self.on_file(path)
+            except Exception as e:
+                logger.error(f"Submission file {path} not handled: {e}")
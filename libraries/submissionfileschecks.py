@@ -3,6 +3,7 @@ from libraries.Config import CONFIG
 from pathlib import Path
 from libraries.logging_file import logger
 import shutil
+import pandas as pd
 
 
 class SubmissionFilesChecks:
@@ -58,6 +59,31 @@ class SubmissionFilesChecks:
                     logger.info(f"Moved {file} to {destination_file}")
         return  True
 
+    def route_submission_file(self, file_path):
+        """validate one new submission file and move it to its competetion folder, return (competition, new path).
+
+        The competition is the longest competetion folder name the file name starts with, (None, None) is returned
+        for a file which is not a readable csv or which matches no competition.
+        """
+        file_name = os.path.basename(file_path)
+        competition_names = [d.name for d in Path(CONFIG.ZindiCompetetionFilesPath.competetion_folder).iterdir() if
+                             d.is_dir()]
+        matching = [name for name in competition_names if file_name.startswith(name)]
+        if not file_name.endswith('.csv') or not matching:
+            logger.info(f"Mismatched files: {[file_name]}")
+            return None, None
+        try:
+            if pd.read_csv(file_path, nrows=1).columns.empty:
+                raise ValueError("no header")
+        except Exception as e:
+            logger.info(f"Unreadable submission file {file_name}: {e}")
+            return None, None
+        competition = max(matching, key=len)
+        destination_file = os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder, competition, file_name)
+        shutil.move(file_path, destination_file)
+        logger.info(f"Moved {file_name} to {destination_file}")
+        return competition, destination_file
+
     def  check_if_competetion_names_and_format_correct(self):
         """checked to see if the  given competetion names are correct."""
         pass
@@ -3,6 +3,14 @@ import os, sys
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
 
 __all__ = [
+    "catalog",
+    "challenge",
+    "convert",
+    "dataset",
+    "leaderboard",
+    "registry",
+    "session",
+    "store",
     "user",
     "utils",
 ]
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from libraries.logging_file import logger
+from libraries.zindi.utils import challenge_sorting_params
+
+
+# Challenges catalog cache
+class ChallengeCatalog:
+    """TTL cache of the Zindi's challenges catalog, persisted on disk and revalidated with ETag/Last-Modified."""
+
+    def __init__(self, url, headers, session=None, ttl=900, cache_path=None):
+        """Load the catalog entries saved by a previous run.
+
+        Parameters
+        ----------
+        url : string
+            The url of the challenges request.
+        headers : dictionary
+            The headers of the challenges request.
+        session : requests.Session, default=None
+            The pooled session to reuse, a new connection is opened if None.
+        ttl : int, default=900
+            The number of seconds a catalog is served without asking the server.
+        cache_path : string, default=None
+            The json file where the catalog is persisted between runs, memory only if None.
+
+        """
+        self.url = url
+        self.headers = headers
+        self.session = requests if session is None else session
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.__lock = threading.Lock()
+        self.__entries = self.__load()
+        self.__indexes = {}  # (catalog, challenge by id) by filter key
+
+    @property
+    def stats(
+        self,
+    ):
+        """Property: Get the hit, miss and revalidation counters of the cache."""
+
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
+
+    def get(self, reward="all", kind="competition", active="all"):
+        """Get the challenges catalog, from the cache while it is fresh.
+
+        Parameters
+        ----------
+        reward : {'prize', 'points', 'knowledge' , 'all'}, default='all'
+            The reward of the challenges for top challengers.
+        kind : {'competition', 'hackathon'}, default='competition'
+            The kind of the challenges.
+        active : {True, False, 'all'}, default='all'
+            The status of the challenges.
+
+        Returns
+        -------
+        response : list | dictionary
+            The "data" part of the json's response of the challenges request.
+        """
+
+        params = challenge_sorting_params(reward=reward, kind=kind, active=active)
+        key = json.dumps(params, sort_keys=True)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+                self.hits += 1
+                return entry["data"]
+            self.misses += 1
+            return self.__fetch(key, params, entry)
+
+    def find(self, challenge_id, reward="all", kind="competition", active="all"):
+        """Get the catalog's record of a challenge by a dict lookup on its id.
+
+        Parameters
+        ----------
+        challenge_id : string
+            The id of the challenge.
+        reward : {'prize', 'points', 'knowledge' , 'all'}, default='all'
+            The reward of the challenges for top challengers.
+        kind : {'competition', 'hackathon'}, default='competition'
+            The kind of the challenges.
+        active : {True, False, 'all'}, default='all'
+            The status of the challenges.
+
+        Returns
+        -------
+        challenge_data : dictionary | None
+            The record of the challenge, None if it is not in the catalog.
+        """
+
+        data = self.get(reward=reward, kind=kind, active=active)
+        if not isinstance(data, list):
+            return None
+        key = json.dumps(challenge_sorting_params(reward=reward, kind=kind, active=active), sort_keys=True)
+        with self.__lock:
+            indexed = self.__indexes.get(key)
+            if indexed is None or indexed[0] is not data:  # index built once per downloaded catalog
+                indexed = (data, {challenge["id"]: challenge for challenge in data})
+                self.__indexes[key] = indexed
+        return indexed[1].get(challenge_id)
+
+    def invalidate(self):
+        """Drop every cached catalog, the next call will download it again."""
+
+        with self.__lock:
+            self.__entries = {}
+            self.__indexes = {}
+            if self.cache_path and os.path.isfile(self.cache_path):
+                os.remove(self.cache_path)
+
+    def __fetch(self, key, params, entry):
+        """Download the catalog, or revalidate the stale entry with a conditional request."""
+
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(self.url, headers=headers, params=params)
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            entry["fetched_at"] = time.time()
+            self.__save()
+            return entry["data"]
+
+        data = response.json()["data"]
+        if "errors" in data:  # do not cache a failed request
+            return data
+        self.__entries[key] = {
+            "data": data,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        self.__save()
+        return data
+
+    def __load(self):
+        """Read the persisted catalog entries."""
+
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable challenges catalog cache {self.cache_path}: {e}")
+            return {}
+
+    def __save(self):
+        """Persist the catalog entries, replacing the file atomically."""
+
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        temporary_path = f"{self.cache_path}.tmp"
+        with open(temporary_path, "w") as cache_file:
+            json.dump(self.__entries, cache_file)
+        os.replace(temporary_path, self.cache_path)
@@ -0,0 +1,557 @@
+import datetime
+import fnmatch
+import os
+
+import pandas as pd
+from libraries.logging_file import logger
+from libraries.zindi.convert import convert_datafiles
+from libraries.zindi.dataset import download_datafiles
+from libraries.zindi.leaderboard import Leaderboard, LeaderboardSnapshot, user_leader_info
+from libraries.zindi.utils import (
+    find_participant,
+    find_participant_paged,
+    iter_participations,
+    n_subimissions_per_day,
+    print_lb,
+    print_submission_board,
+    upload,
+    user_on_lb,
+)
+
+
+# Challenge handle
+class ChallengeHandle:
+    """Stateless handle on one challenge, every per-challenge operation of a Zindian goes through it.
+
+    A handle only keeps the challenge data and its Zindian, so switching challenges costs nothing and the
+    same handle can be used from several threads.
+    """
+
+    __slots__ = ("id", "data", "api", "_user")
+
+    def __init__(self, user, challenge_data):
+        """Bind a challenge of the catalog to the signed in user.
+
+        Parameters
+        ----------
+        user : Zindian
+            The signed in user.
+        challenge_data : dictionary
+            The catalog's record of the challenge.
+
+        """
+        self._user = user
+        self.data = challenge_data
+        self.id = challenge_data["id"]
+        self.api = f"{user.base_api}/{self.id}"
+
+    def __repr__(self):
+        return f"ChallengeHandle({self.id!r})"
+
+    @property
+    def subtitle(
+        self,
+    ):
+        """Property: Get the subtitle of the challenge."""
+
+        return self.data.get("subtitle", "")
+
+    ## Submission limits
+    def submission_limits(self) -> dict:
+        """Get the daily submission limits of the challenge.
+
+        Returns
+        -------
+        limits : dictionary | json
+            The json's response of the limits request, None if the request failed.
+        """
+
+        url = f"{self.api}/submissions/limits"
+        headers = {
+            "accept": "*/*",
+            "accept-encoding": "gzip, deflate, br, zstd",
+            "accept-language": "en-US,en;q=0.9",
+            "auth-token": f"{self._user.auth_headers['auth_token']}",
+            "origin": "https://zindi.africa",
+            "referer": f"https://zindi.africa/competitions/{self.id}/submit",
+            "user-agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
+        }
+
+        response = self._user.session.get(url, headers=headers)
+        if response.status_code == 200:
+            logger.info(response.json())
+            return response.json()
+        else:
+            print(f"ERROR API FAILED: {response.status_code}, {response.text}")
+
+    @property
+    def remaining_subimissions(
+        self,
+    ):
+        """Property: Get the number of now remaining submissions for the challenge.
+
+        Returns
+        -------
+        free_submissions : int, default=n_subimissions_per_day.
+            The number of now remaining submissions.
+        """
+
+        headers = self._user.auth_headers
+        n_sub = n_subimissions_per_day(url=self.api, headers=headers, session=self._user.session)
+        n_submitted_today = 0
+        sb_time = pd.DataFrame(self.submission_board(to_print=False))
+
+        if n_sub > 0:
+            if sb_time.shape[0] != 0:
+                sb_time = sb_time[
+                    ["id", "status", "created_at", "filename"]
+                ]  # get useful columns
+                sb_time["created_at"] = pd.to_datetime(
+                    sb_time["created_at"]
+                )  # .tz_localize('UTC')
+                sb_time["now"] = pd.to_datetime(
+                    datetime.datetime.utcnow()
+                ).tz_localize("UTC")
+                sb_time["delta"] = sb_time["now"] - sb_time["created_at"]
+                n_submitted_today = sb_time[
+                    (sb_time.status.isin(["successful", "initial"]))
+                    & (sb_time.delta.dt.days < 1)
+                ].shape[0]
+                free_submissions = n_sub - n_submitted_today
+            else:
+                free_submissions = n_sub
+        else:
+            free_submissions = n_sub
+        msg = f"\n[ 🟢 ] You have {free_submissions} remaining submissions for the challenge {self.id}.\n"
+        print(msg)
+        return free_submissions
+
+    ## Download dataset
+    def download_dataset(
+        self, destination=".", make_destination=True, workers=None, sync=True, convert=None, extract=False,
+        filenames=None,
+    ):
+        """Download the dataset of the challenge.
+
+        Parameters
+        ----------
+        destination : int, default='.'
+            The dataset's destination folder .
+        make_destination : boolean, default=True
+            Create destination folder if doesn't exist.
+        workers : int, default=None
+            The number of files downloaded at the same time, the user's download_workers if None.
+        sync : boolean, default=True
+            Only download the files new or changed since the last download in destination.
+        convert : {'parquet', 'arrow'}, default=None
+            Convert the CSV datafiles, and the CSV files inside zip datafiles, to this format next to them,
+            the user's dataset_format if None.
+        extract : boolean, default=False
+            Extract the zip archives in destination as soon as each one is downloaded, the archives extracted
+            by a previous call are skipped.
+        filenames : list, default=None
+            Only download the datafiles matching one of these case-insensitive patterns,
+            e.g. ["*sample*submission*.csv"], all the datafiles if None.
+
+        Returns
+        -------
+        summary : dictionary
+            The downloaded, linked from the store, skipped and extracted filenames, the failures by filename, the
+            number of bytes and seconds, and the converted tables when convert is set.
+        """
+
+        if not os.path.isdir(destination):
+            os.makedirs(destination, exist_ok=True)
+        headers = self._user.auth_headers
+        data = {"auth_token": headers["auth_token"]}
+        url = self.api
+
+        response = self._user.session.get(url, headers=headers, data=data)
+        datafiles_ = response.json()["data"]["datafiles"]
+        datafiles = []
+        [
+            datafiles.append(i) for i in datafiles_ if i not in datafiles
+        ]  # remove deplicates
+        if filenames is not None:
+            datafiles = [
+                i for i in datafiles
+                if any(fnmatch.fnmatch(i["filename"].lower(), pattern.lower()) for pattern in filenames)
+            ]
+
+        summary = download_datafiles(
+            datafiles=datafiles,
+            url=url,
+            destination=destination,
+            headers=headers,
+            session=self._user.session,
+            workers=self._user.download_workers if workers is None else workers,
+            segments=self._user.download_segments,
+            sync=sync,
+            store=self._user.dataset_store,
+            extract=extract,
+        )
+        convert = self._user.dataset_format if convert is None else convert
+        if convert:
+            paths = [
+                os.path.join(destination, filename)
+                for filename in summary["downloaded"] + summary["linked"] + summary["skipped"]
+            ]
+            summary["converted"] = convert_datafiles(paths=paths, destination=destination, output_format=convert)
+        return summary
+
+    ## Push submission file
+    def submit(self, filepaths=[], comments=[]):
+        """Push submission files for the challenge to Zindi platform.
+
+        Parameters
+        ----------
+        filepaths : list
+            The filepaths of submission files to push.
+        comments : list
+            The comments of submission files to push.
+
+        Returns
+        -------
+        submission_ids : list
+            The Zindi's submission id of each file, None for a file not submitted.
+        """
+
+        headers = self._user.auth_headers
+        url = f"{self.api}/submissions"
+        submission_ids = []
+        allowed_extensions = [
+            "csv",
+        ]
+        comments = list(comments)
+        if len(comments) < len(filepaths):
+            n_blank_comment = len(filepaths) - len(comments)
+            comments += [""] * n_blank_comment
+
+        for filepath, comment in zip(filepaths, comments):
+            submission_ids.append(None)
+            extension = filepath.split(".")[-1].strip().lower()
+            if extension in allowed_extensions:
+                if os.path.isfile(filepath):
+                    response = upload(
+                        filepath=filepath,
+                        comment=comment,
+                        url=url,
+                        headers=headers,
+                        session=self._user.session,
+                    )
+                    response = response.json()["data"]
+                    try:
+                        print(
+                            f"\n[ 🔴 ] Something wrong with file :{filepath} ,\n{response['errors']}\n"
+                        )
+                    except:
+                        print(
+                            f"\n[ 🟢 ] Submission ID: {response['id'] } - File submitted : {filepath}\n"
+                        )
+                        submission_ids[-1] = response["id"]
+                        snapshot = self._user.leaderboards.get(self.id)
+                        if snapshot is not None:
+                            snapshot.expect_new_score()
+                else:
+                    print(
+                        f"\n[ 🔴 ] File doesn't exists, please verify this filepath : {filepath}\n"
+                    )
+            else:
+                print(
+                    f"\n[ 🔴 ] Submission file must be a CSV file ( .csv ),\n\tplease verify this filepath : {filepath}\n"
+                )
+        return submission_ids
+
+    ## Leaderboard
+    def leaderboard_snapshot(self, refresh=False):
+        """Get the leaderboard snapshot of the challenge, downloaded only when it is not fresh.
+
+        Parameters
+        ----------
+        refresh : boolean, default=False
+            Download the leaderboard even if the snapshot is still fresh.
+
+        Returns
+        -------
+        snapshot : LeaderboardSnapshot
+            The leaderboard of the challenge.
+        """
+
+        snapshot = self._user.leaderboards.get(self.id)
+        if snapshot is not None and snapshot.is_fresh() and not refresh:
+            return snapshot
+
+        url = f"{self.api}/participations"
+        challengers_data = Leaderboard.from_participants(
+            iter_participations(url=url, headers=self._user.auth_headers, session=self._user.session)
+        )
+        snapshot = LeaderboardSnapshot(
+            challenge_id=self.id, challengers_data=challengers_data, max_age=self._user.leaderboard_max_age
+        )
+        self._user.leaderboards[self.id] = snapshot
+        return snapshot
+
+    def leaderboard(self, user_name_for_rank="", to_print=True):
+        """Get the leaderboard and the user rank for the challenge.
+
+        Parameters
+        ----------
+        user_name_for_rank : string | list, default=""
+            The username(s) to rank, the team rank is used if empty.
+        to_print : boolean, default=True
+            Display the leaderboard or not.
+
+        Returns
+        -------
+        rank : int
+            The rank of the user, 0 if the user is not yet ranked.
+        """
+
+        snapshot = self.leaderboard_snapshot()
+        rank_key = user_name_for_rank if isinstance(user_name_for_rank, str) else tuple(user_name_for_rank)
+        if rank_key not in snapshot.ranks:
+            snapshot.ranks[rank_key] = user_on_lb(
+                user_name=user_name_for_rank,
+                challengers_data=snapshot.challengers_data,
+                challenge_id=self.id,
+                username=self._user.username,
+                headers=self._user.auth_headers,
+                session=self._user.session,
+                index=snapshot.index,
+            )
+        rank = snapshot.ranks[rank_key]
+        if to_print:
+            print_lb(challengers_data=snapshot.challengers_data, user_rank=rank)
+        return rank
+
+    def my_rank(self, user_name_for_rank=""):
+        """Get the user rank on the leaderboard of the challenge.
+
+        Parameters
+        ----------
+        user_name_for_rank : string | list, default=""
+            The username(s) to rank, the team rank is used if empty.
+
+        Returns
+        -------
+        int_rank : int
+            The rank of the user, 0 if the user is not yet ranked.
+        """
+
+        snapshot = self._user.leaderboards.get(self.id)
+        paged = (
+            self._user.rank_page_size
+            and isinstance(user_name_for_rank, str)
+            and not (snapshot is not None and snapshot.is_fresh())
+        )
+        if paged:
+            int_rank = self.rank_paged(user_name_for_rank)
+        else:
+            int_rank = self.leaderboard(user_name_for_rank, to_print=False)
+        if int_rank == 0:
+            rank = "not yet"
+        elif str(int_rank)[-1] == "1":
+            if str(int_rank)[-2:] == "11":
+                rank = f"{int_rank}th"
+            else:
+                rank = f"{int_rank}st"
+        elif str(int_rank)[-1] == "2":
+            rank = f"{int_rank}nd"
+        elif str(int_rank)[-1] == "3":
+            rank = f"{int_rank}rd"
+        else:
+            rank = f"{int_rank}th"
+        print(f"\n[ 🟢 ] You are {rank} on the leaderboad of {self.id} challenge, Go on...\n")
+        return int_rank
+
+    def rank_paged(self, user_name):
+        """Get the user rank of the challenge by fetching small leaderboard pages.
+
+        Parameters
+        ----------
+        user_name : string
+            The username to look for, the signed in username is used if empty or not found.
+
+        Returns
+        -------
+        rank : int
+            The rank of the user, 0 if the user is not yet ranked.
+        """
+
+        url = f"{self.api}/participations"
+        rank = 0
+        # the signed in username is only a fallback, it is looked for after the given one
+        for name in dict.fromkeys(name for name in (user_name, self._user.username) if name):
+            key = (self.id, name)
+            participant, n_pages = find_participant_paged(
+                url=url,
+                headers=self._user.auth_headers,
+                user_names=[name],
+                session=self._user.session,
+                per_page=self._user.rank_page_size,
+                hint_rank=self._user.last_known_ranks.get(key),
+            )
+            logger.info(f"Looked up {name} in {n_pages} leaderboard page(s) of {self._user.rank_page_size}")
+            if participant is not None:
+                rank = 0 if participant["rank"] is None else int(participant["rank"])
+                if rank:
+                    self._user.last_known_ranks[key] = rank
+                break
+        return rank
+
+    def get_leaderboard_data(self, user_name) -> list:
+        """Get the rank, score, name and best submission time of a user on the leaderboard.
+
+        Parameters
+        ----------
+        user_name : string
+            The username, or "TEAM - {title}" for a team.
+
+        Returns
+        -------
+        user_leader_info : list | None
+            The leaderboard row of the user, None if the user is not on the leaderboard.
+        """
+
+        snapshot = self._user.leaderboards.get(self.id)
+        if snapshot is not None and snapshot.is_fresh():
+            return snapshot.user_row(user_name)
+        # no snapshot to answer from, stream the leaderboard until the user row
+        url = f"{self.api}/participations"
+        participant = find_participant(
+            url=url, headers=self._user.auth_headers, user_name=user_name, session=self._user.session
+        )
+        return None if participant is None else user_leader_info(participant)
+
+    ## Show Submission-board
+    def submission_board(self, to_print=True):
+        """Get the submission-board for the challenge.
+
+        Parameters
+        ----------
+        to_print : boolean, default=True
+            Display the submission-board or not.
+
+        Returns
+        -------
+        sb_data : list
+            The submissions of the user for the challenge.
+        """
+
+        url = f"{self.api}/submissions"
+        headers = self._user.auth_headers
+
+        params_in_url = {
+            "per_page": 1000
+        }  # per_page : max number of subimission to retrieve
+        response = self._user.session.get(
+            url,
+            headers=headers,
+            data={"auth_token": headers["auth_token"]},
+            params=params_in_url,
+        )
+        response = response.json()["data"]
+        if "errors" in response:
+            error_msg = f"\n[ 🔴 ] {response['errors']}\n"
+            raise Exception(error_msg)
+        if to_print:
+            print_submission_board(submissions_data=response)
+        return response
+
+    # Team
+    ## Create
+    def create_team(self, team_name, teammates=[]):
+        """Create a team for the challenge.
+
+        Parameters
+        ----------
+        team_name : string
+            Name of the team to create.
+        teammates : list
+            List of usernames of Zindians you want to invite to be part of your team.
+
+        """
+
+        headers = {
+            **self._user.headers,
+        }
+        url = f"{self.api}/my_team"
+        data = {"title": team_name, "auth_token": self._user.auth_headers["auth_token"]}
+
+        response = self._user.session.post(url, headers=headers, data=data)
+        response = response.json()["data"]
+        if ("errors" in response) and (
+            "Leader can only be" not in response["errors"]["base"]
+        ):
+
+            error_msg = f"\n[ 🔴 ] {response['errors']['base']}\n"
+            raise Exception(error_msg)
+        else:
+            if ("errors" in response) and (
+                "Leader can only be" in response["errors"]["base"]
+            ):
+                print("\n[ 🟢 ] You are already the leader of a team.\n")
+            else:
+                print(
+                    f"\n[ 🟢 ] Your team is well created as :{response['title']}\n"
+                )
+            ##### Invite teammates
+            if len(teammates) > 0:
+                self.team_up(zindians=teammates)
+            else:
+                print(
+                    "You can send invitation to join your team using teamup function"
+                )
+
+    ## Team Up
+    def team_up(self, zindians=[]):
+        """Add challengers to user team for the challenge.
+
+        Parameters
+        ----------
+        zindians : list
+            List of challenger's usernames of Zindians to add the team.
+
+        """
+
+        headers = {
+            **self._user.headers,
+        }
+        url = f"{self.api}/my_team/invite"
+
+        for zindian in zindians:
+            data = {"username": zindian}
+            response = self._user.session.post(url, headers=headers, data=data)
+            response = response.json()["data"]
+            if "errors" in response:
+                if "is already invited" in response["errors"]["base"]:
+                    print(
+                        f"\n[ 🟢 ] An invitation has been sent already to join your team to: {zindian}\n"
+                    )
+                else:
+                    error_msg = f"\n[ 🔴 ] {response['errors']}\n"
+                    raise Exception(error_msg)
+            else:
+                print(
+                    f"\n[ 🟢 ] An invitation has been sent to join your team to: {zindian}\n"
+                )
+
+    ## Disband
+    def disband_team(
+        self,
+    ):
+        """Disband user team for the challenge."""
+
+        headers = {
+            **self._user.headers,
+        }
+        data = {"auth_token": self._user.auth_headers["auth_token"]}
+        url = f"{self.api}/my_team"
+
+        response = self._user.session.delete(url, headers=headers, data=data)
+        response = response.json()["data"]
+        if "errors" in response:
+            error_msg = f"\n[ 🔴 ] {response['errors']}\n"
+            raise Exception(error_msg)
+        else:
+            print(f"\n[ 🟢 ] {response}\n")
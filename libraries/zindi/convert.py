@@ -0,0 +1,178 @@
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from libraries.logging_file import logger
+
+try:  # columnar conversion of the datasets, only required when it is asked
+    import pyarrow
+    import pyarrow.csv as pyarrow_csv
+    import pyarrow.ipc as pyarrow_ipc
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+SCHEMA_INDEX = ".zindi_schema.json"
+
+
+## Convert the tabular datafiles of a dataset
+def convert_datafiles(paths, destination, output_format="parquet", workers=None):
+    """Convert the CSV datafiles, and the CSV files inside zip datafiles, to Parquet or Arrow IPC files.
+
+    Each table is written next to its original in a process pool, then described in the schema index
+    "{destination}/.zindi_schema.json". A table already converted after its original changed is skipped.
+
+    Parameters
+    ----------
+    paths : list
+        The paths of the downloaded datafiles, the files other than .csv and .zip are ignored.
+    destination : string
+        The dataset's destination folder, where the schema index is written.
+    output_format : {'parquet', 'arrow'}, default='parquet'
+        The format of the converted tables, an Arrow IPC file can be memory-mapped.
+    workers : int, default=None
+        The number of processes converting at the same time, the number of CPUs if None.
+
+    Returns
+    -------
+    converted : dictionary
+        The schema index entries of the tables converted by this call, by output path.
+    """
+
+    if pyarrow is None:
+        raise Exception("\n[ 🔴 ] pyarrow is required to convert the dataset, install it with : pip install pyarrow\n")
+    if output_format not in FORMATS:
+        raise Exception(f"\n[ 🔴 ] Unknown dataset format {output_format}, use one of : {', '.join(FORMATS)}.\n")
+
+    jobs = [job for job in _conversion_jobs(paths, FORMATS[output_format]) if not _is_converted(*job)]
+    converted = {}
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_convert_table, source, member, output, output_format): output
+                for source, member, output in jobs
+            }
+            for future, output in futures.items():
+                try:
+                    converted[output] = future.result()
+                except Exception as e:
+                    logger.error(f"Conversion of {output} failed: {e}")
+
+    _update_schema_index(destination, converted)
+    print(f"\n[ 🟢 ] {len(converted)} table(s) converted to {output_format}.\n")
+    return converted
+
+
+def _conversion_jobs(paths, extension):
+    """List the (source, zip member or None, output path) of the tables to convert."""
+
+    for source in paths:
+        folder = os.path.dirname(source)
+        if source.lower().endswith(".csv"):
+            yield source, None, os.path.splitext(source)[0] + extension
+        elif source.lower().endswith(".zip") and zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                for member in archive.namelist():
+                    if not member.lower().endswith(".csv") or member.startswith("__MACOSX/"):
+                        continue
+                    output = os.path.join(folder, os.path.splitext(member)[0] + extension)
+                    # never write outside the dataset folder : absolute or ".." member paths are skipped
+                    if os.path.isabs(member) or os.path.splitdrive(member)[0] or \
+                            os.path.commonpath([os.path.realpath(folder), os.path.realpath(output)]) \
+                            != os.path.realpath(folder):
+                        logger.info(f"Skipping {member} of {source}, its path leaves the dataset folder")
+                        continue
+                    yield source, member, output
+
+
+def _is_converted(source, member, output):
+    """Check if the output is newer than its original."""
+
+    return os.path.isfile(output) and os.path.getmtime(output) >= os.path.getmtime(source)
+
+
+def _convert_table(source, member, output, output_format):
+    """Stream one CSV table to a Parquet or Arrow IPC file, in a worker process.
+
+    Returns the schema index entry of the table.
+    """
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    temporary_path = f"{output}.tmp"
+    try:
+        rows, schema = _write_batches(source, member, temporary_path, output_format)
+    except pyarrow.ArrowInvalid:  # a type inferred on the first block does not fit a later one
+        with _open_table(source, member) as file:
+            table = pyarrow_csv.read_csv(file)
+        _write_table(table, temporary_path, output_format)
+        rows, schema = table.num_rows, table.schema
+    os.replace(temporary_path, output)
+    return {
+        "source": source,
+        "member": member,
+        "rows": rows,
+        "columns": {field.name: str(field.type) for field in schema},
+    }
+
+
+@contextmanager
+def _open_table(source, member):
+    """Open a CSV file, or a CSV member of a zip file, in binary mode."""
+
+    if member is None:
+        with open(source, "rb") as file:
+            yield file
+    else:
+        with zipfile.ZipFile(source) as archive, archive.open(member) as file:
+            yield file
+
+
+def _write_batches(source, member, path, output_format):
+    """Write the CSV record batches one by one, so the memory stays bounded by a block."""
+
+    rows = 0
+    with _open_table(source, member) as file:
+        reader = pyarrow_csv.open_csv(file)
+        schema = reader.schema
+        if output_format == "parquet":
+            writer = pyarrow_parquet.ParquetWriter(path, schema)
+        else:
+            writer = pyarrow_ipc.new_file(path, schema)
+        with writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows, schema
+
+
+def _write_table(table, path, output_format):
+    if output_format == "parquet":
+        pyarrow_parquet.write_table(table, path)
+    else:
+        with pyarrow_ipc.new_file(path, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _update_schema_index(destination, converted):
+    """Merge the converted tables in the schema index of the destination, replacing the file atomically."""
+
+    path = os.path.join(destination, SCHEMA_INDEX)
+    index = {}
+    if os.path.isfile(path):
+        try:
+            with open(path, "r") as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable schema index {path}: {e}")
+    for output, entry in converted.items():
+        index[os.path.relpath(output, destination)] = {
+            **entry,
+            "source": os.path.relpath(entry["source"], destination),
+        }
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as index_file:
+        json.dump(index, index_file, indent=2)
+    os.replace(temporary_path, path)
@@ -0,0 +1,318 @@
+import json
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from libraries.logging_file import logger
+from libraries.zindi.utils import download, file_sha256, remote_metadata
+from tqdm import tqdm
+
+
+# Dataset manifest
+class DatasetManifest:
+    """Size, ETag, Last-Modified and sha256 of the datafiles downloaded in a destination folder."""
+
+    filename = ".zindi_manifest.json"
+
+    def __init__(self, destination):
+        """Load the manifest of the destination folder.
+
+        Parameters
+        ----------
+        destination : string
+            The dataset's destination folder.
+
+        """
+        self.path = os.path.join(destination, self.filename)
+        self.__lock = threading.Lock()
+        self.__entries = self.__load()
+
+    def __contains__(self, filename):
+        with self.__lock:
+            return filename in self.__entries
+
+    def get(self, filename):
+        """Get the recorded entry of a datafile, None if it has never been downloaded."""
+
+        with self.__lock:
+            return self.__entries.get(filename)
+
+    def is_current(self, filename, local_path, metadata):
+        """Check if the local copy of a datafile is the one on the server.
+
+        Parameters
+        ----------
+        filename : string
+            The name of the datafile.
+        local_path : string
+            The path of the local copy.
+        metadata : dictionary
+            The remote_metadata of the datafile.
+
+        Returns
+        -------
+        current : boolean
+            True when the local copy has the recorded size and the server validators did not change.
+        """
+
+        entry = self.get(filename)
+        if entry is None or not os.path.isfile(local_path) or os.path.getsize(local_path) != entry["size"]:
+            return False
+        if metadata["size"] is not None and metadata["size"] != entry["size"]:
+            return False
+        validators = [key for key in ("etag", "last_modified") if metadata[key] and entry.get(key)]
+        if not validators:  # nothing to tell a changed file from the same one
+            return False
+        return all(metadata[key] == entry[key] for key in validators)
+
+    def record(self, filename, local_path, metadata, sha256=None):
+        """Record a downloaded datafile and persist the manifest, the sha256 is computed if None."""
+
+        entry = {
+            "size": os.path.getsize(local_path),
+            "etag": metadata["etag"],
+            "last_modified": metadata["last_modified"],
+            "sha256": file_sha256(local_path) if sha256 is None else sha256,
+        }
+        with self.__lock:
+            self.__entries[filename] = entry
+            self.__save()
+
+    def is_extracted(self, filename, destination):
+        """Check if an archive has been extracted since its last download and its members are still there.
+
+        Parameters
+        ----------
+        filename : string
+            The name of the archive datafile.
+        destination : string
+            The folder the archive is extracted in.
+
+        Returns
+        -------
+        extracted : boolean
+            True when the recorded extraction is the one of the current archive.
+        """
+
+        entry = self.get(filename)
+        if entry is None or "extracted" not in entry or entry["extracted"]["sha256"] != entry["sha256"]:
+            return False
+        return all(os.path.exists(os.path.join(destination, member)) for member in entry["extracted"]["members"])
+
+    def record_extraction(self, filename, members):
+        """Record the members extracted from an archive datafile and persist the manifest."""
+
+        with self.__lock:
+            entry = self.__entries[filename]
+            entry["extracted"] = {"sha256": entry["sha256"], "members": members}
+            self.__save()
+
+    def __load(self):
+        """Read the persisted manifest."""
+
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable dataset manifest {self.path}: {e}")
+            return {}
+
+    def __save(self):
+        """Persist the manifest, replacing the file atomically."""
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as manifest_file:
+            json.dump(self.__entries, manifest_file, indent=2)
+        os.replace(temporary_path, self.path)
+
+
+## Download the datafiles of a challenge
+def download_datafiles(
+    datafiles, url, destination, headers, session=None, workers=4, segments=1, sync=True, store=None, extract=False
+):
+    """Download the datafiles of a challenge with a bounded pool of workers and one aggregate progress bar.
+
+    A failing file does not stop the others, the failures are reported at the end. An interrupted file
+    is resumed from its ".part" file on the next call. With sync, the files unchanged on the server since
+    the last call are skipped after a one byte metadata request. With a store, a file already downloaded
+    for any competition is linked from the store instead of being downloaded again. With extract, each zip
+    archive is extracted by a worker as soon as it is downloaded, while the other files are still downloading.
+
+    Parameters
+    ----------
+    datafiles : list
+        The datafiles of the challenge, as in the "datafiles" of the challenge request.
+    url : string
+        The url of the challenge.
+    destination : string
+        The dataset's destination folder.
+    headers : dictionary
+        The headers of the download's requests.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+    workers : int, default=4
+        The maximum number of files downloaded at the same time.
+    segments : int, default=1
+        The number of ranges downloaded at the same time for a file bigger than 256 MB.
+    sync : boolean, default=True
+        Skip the files recorded in the destination's manifest and unchanged on the server.
+    store : DatasetStore, default=None
+        The content-addressed store shared by the competitions, not used if None.
+    extract : boolean, default=False
+        Extract the zip archives in destination, the archives extracted by a previous call are skipped.
+
+    Returns
+    -------
+    summary : dictionary
+        The downloaded, linked from the store, skipped and extracted filenames, the failures by filename, the
+        number of bytes and seconds.
+    """
+
+    summary = {
+        "downloaded": [],
+        "linked": [],
+        "skipped": [],
+        "extracted": [],
+        "failed": {},
+        "bytes": 0,
+        "seconds": 0.0,
+    }
+    manifest = DatasetManifest(destination)
+    lock = threading.Lock()
+    start = time.monotonic()
+
+    with tqdm(
+        desc=f"Dataset {os.path.basename(url)}",
+        unit="o",
+        unit_scale=True,
+        unit_divisor=1024,
+    ) as bar:
+
+        def progress(size):
+            with lock:
+                bar.update(size)
+
+        def sync_datafile(filename):
+            file_url = f"{url}/files/{filename}"
+            local_path = os.path.join(destination, filename)
+            metadata = remote_metadata(url=file_url, headers=headers, session=session)
+            if sync and manifest.is_current(filename, local_path, metadata):
+                return "skipped", 0
+            sha256 = None if store is None else store.lookup(metadata)
+            if sha256 is not None:
+                store.link(sha256, local_path)
+                manifest.record(filename, local_path, metadata, sha256=sha256)
+                return "linked", 0
+            size = download(
+                url=file_url,
+                filename=local_path,
+                headers=headers,
+                session=session,
+                progress=progress,
+                segments=segments,
+                metadata=metadata,
+            )
+            if store is not None:
+                sha256 = store.add(local_path, metadata)
+            manifest.record(filename, local_path, metadata, sha256=sha256)
+            return "downloaded", size
+
+        extractions = {}
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="extract") as extractor:
+            with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="download") as executor:
+                futures = {
+                    executor.submit(sync_datafile, data["filename"]): data["filename"] for data in datafiles
+                }
+                for future in as_completed(futures):
+                    filename = futures[future]
+                    try:
+                        status, size = future.result()
+                        summary[status].append(filename)
+                        summary["bytes"] += size
+                    except Exception as e:
+                        summary["failed"][filename] = str(e)
+                        logger.error(f"Download of {filename} failed: {e}")
+                        continue
+                    local_path = os.path.join(destination, filename)
+                    if (
+                        extract
+                        and zipfile.is_zipfile(local_path)
+                        and not manifest.is_extracted(filename, destination)
+                    ):
+                        extractions[extractor.submit(extract_archive, local_path, destination)] = filename
+
+            wait(extractions)
+            for future, filename in extractions.items():
+                try:
+                    manifest.record_extraction(filename, future.result())
+                    summary["extracted"].append(filename)
+                except Exception as e:
+                    summary["failed"][filename] = str(e)
+                    logger.error(f"Extraction of {filename} failed: {e}")
+
+    summary["seconds"] = time.monotonic() - start
+    print_download_summary(summary)
+    return summary
+
+
+## Extract an archive
+def extract_archive(path, destination):
+    """Extract a zip archive member by member, with a progress bar of the extracted bytes.
+
+    Parameters
+    ----------
+    path : string
+        The path of the zip archive.
+    destination : string
+        The folder to extract the archive in.
+
+    Returns
+    -------
+    members : list
+        The names of the extracted members.
+    """
+
+    with zipfile.ZipFile(path) as archive:
+        infos = archive.infolist()
+        with tqdm(
+            desc=f"Extract {os.path.basename(path)}",
+            total=sum(info.file_size for info in infos),
+            unit="o",
+            unit_scale=True,
+            unit_divisor=1024,
+        ) as bar:
+            for info in infos:
+                bar.set_postfix_str(info.filename, refresh=False)
+                parts = [part for part in info.filename.split("/") if part not in ("", ".", "..")]
+                target = os.path.join(destination, *parts)
+                if not info.is_dir() and os.path.isfile(target):
+                    os.remove(target)  # never write through a hardlink of the dataset store
+                archive.extract(info, destination)  # the member names are sanitized against "../"
+                bar.update(info.file_size)
+    return [info.filename for info in infos]
+
+
+## Print
+### Download summary
+def print_download_summary(summary):
+    """Formated print the number of files, bytes and throughput of a dataset download.
+
+    Parameters
+    ----------
+    summary : dictionary
+        The summary returned by download_datafiles.
+    """
+
+    megabytes = summary["bytes"] / (1024 * 1024)
+    seconds = max(summary["seconds"], 1e-6)
+    print(
+        f"\n[ 🟢 ] {len(summary['downloaded'])} file(s), {megabytes:.1f} MB in {summary['seconds']:.1f} s"
+        f" ({megabytes / seconds:.1f} MB/s), {len(summary['linked'])} file(s) linked from the store,"
+        f" {len(summary['skipped'])} unchanged file(s) skipped, {len(summary['extracted'])} archive(s) extracted.\n"
+    )
+    for filename, error in summary["failed"].items():
+        print(f"[ 🔴 ] {filename} : {error}")
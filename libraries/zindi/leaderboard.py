@@ -0,0 +1,340 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# Columnar leaderboard
+class Leaderboard:
+    """Compact columnar leaderboard: NumPy arrays for rank, score, submission count and time, interned names."""
+
+    def __init__(self, rank, score, submission_count, submitted_at, name, team_id):
+        """Keep the columns of a leaderboard, ordered as the Zindi's leaderboard.
+
+        Parameters
+        ----------
+        rank : ndarray of shape (n_rows,)
+            The rank of each row, 0 for the not yet active challengers.
+        score : ndarray of shape (n_rows,)
+            The best score of each row, NaN when there is none.
+        submission_count : ndarray of shape (n_rows,)
+            The number of submissions of each row.
+        submitted_at : ndarray of shape (n_rows,)
+            The UTC time of the best submission of each row, NaT when there is none.
+        name : ndarray of shape (n_rows,)
+            The interned username, or "TEAM - {title}", of each row.
+        team_id : ndarray of shape (n_rows,)
+            The interned team id of each row, None for a single user.
+
+        """
+        self.rank = rank
+        self.score = score
+        self.submission_count = submission_count
+        self.submitted_at = submitted_at
+        self.name = name
+        self.team_id = team_id
+
+    @classmethod
+    def from_participants(cls, participants):
+        """Build the columns from projected leaderboard rows, the rows can be streamed.
+
+        Parameters
+        ----------
+        participants : iterable
+            The leaderboard rows, projected with project_participant.
+
+        Returns
+        -------
+        leaderboard : Leaderboard
+            The columnar leaderboard.
+        """
+
+        if isinstance(participants, Leaderboard):
+            return participants
+        rank, score, submission_count, submitted_at, name, team_id = [], [], [], [], [], []
+        for participant in participants:
+            rank.append(participant["rank"] or 0)
+            score.append(np.nan if participant["score"] is None else participant["score"])
+            submission_count.append(participant["submission_count"] or 0)
+            submitted_at.append(participant["submitted_at"])
+            name.append(sys.intern(str(participant["name"])))
+            team_id.append(None if participant["team_id"] is None else sys.intern(str(participant["team_id"])))
+        submitted_at = pd.to_datetime(pd.Series(submitted_at, dtype=object), utc=True, errors="coerce")
+        return cls(
+            rank=np.asarray(rank, dtype=np.int32),
+            score=np.asarray(score, dtype=np.float64),
+            submission_count=np.asarray(submission_count, dtype=np.int32),
+            submitted_at=submitted_at.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]"),
+            name=np.asarray(name, dtype=object),
+            team_id=np.asarray(team_id, dtype=object),
+        )
+
+    def __len__(self):
+        return self.rank.shape[0]
+
+    def __getitem__(self, position):
+        """Get one row of the leaderboard as a projected row."""
+
+        submitted_at = self.submitted_at[position]
+        return {
+            "rank": None if self.rank[position] == 0 else int(self.rank[position]),
+            "score": None if np.isnan(self.score[position]) else float(self.score[position]),
+            "name": self.name[position],
+            "submission_count": int(self.submission_count[position]),
+            "submitted_at": None if np.isnat(submitted_at) else pd.Timestamp(submitted_at, tz="UTC"),
+            "team_id": self.team_id[position],
+        }
+
+    @property
+    def n_ranked(
+        self,
+    ):
+        """Property: Get the number of challengers ranked on the leaderboard."""
+
+        return int(np.count_nonzero(self.rank))
+
+    def top_k(self, k=10):
+        """Get the k best ranked rows.
+
+        Parameters
+        ----------
+        k : int, default=10
+            The number of rows to get.
+
+        Returns
+        -------
+        rows : list
+            The projected rows of the k best ranked challengers.
+        """
+
+        ranked = np.flatnonzero(self.rank)
+        best = ranked[np.argsort(self.rank[ranked], kind="stable")[:k]]
+        return [self[position] for position in best]
+
+    def window(self, position, size=5):
+        """Get the rows around a position of the leaderboard.
+
+        Parameters
+        ----------
+        position : int
+            The row position of the user, see LeaderboardIndex.position.
+        size : int, default=5
+            The number of rows to get above and below the user.
+
+        Returns
+        -------
+        rows : list
+            The projected rows around the user, the user included.
+        """
+
+        start = max(position - size, 0)
+        stop = min(position + size + 1, len(self))
+        return [self[i] for i in range(start, stop)]
+
+    def score_gap(self, position, k=1):
+        """Get the score difference between a row and the challenger ranked k.
+
+        Parameters
+        ----------
+        position : int
+            The row position of the user.
+        k : int, default=1
+            The rank to compare with.
+
+        Returns
+        -------
+        gap : float
+            The score of rank k minus the score of the user, NaN if rank k does not exist.
+        """
+
+        target = np.flatnonzero(self.rank == k)
+        if target.shape[0] == 0:
+            return float("nan")
+        return float(self.score[target[0]] - self.score[position])
+
+    def percentile(self, position):
+        """Get the percentage of ranked challengers placed at or behind a row, the row included.
+
+        Parameters
+        ----------
+        position : int
+            The row position of the user.
+
+        Returns
+        -------
+        percentile : float
+            100 for the first, 100 / n_ranked for the last, 0 for a not yet ranked challenger.
+        """
+
+        rank = self.rank[position]
+        n_ranked = self.n_ranked
+        if rank == 0 or n_ranked == 0:
+            return 0.0
+        return float(np.count_nonzero(self.rank >= rank)) * 100.0 / n_ranked
+
+    def memory_usage(self):
+        """Get the number of bytes used by the columns, the interned name strings excluded."""
+
+        return sum(
+            column.nbytes
+            for column in (self.rank, self.score, self.submission_count, self.submitted_at, self.name, self.team_id)
+        )
+
+
+# Leaderboard snapshot
+class LeaderboardSnapshot:
+    """One download of a challenge leaderboard, shared by rank lookup, user row lookup and printing."""
+
+    def __init__(self, challenge_id, challengers_data, max_age=None):
+        """Keep the leaderboard rows of a challenge.
+
+        Parameters
+        ----------
+        challenge_id : string
+            The id of the challenge.
+        challengers_data : Leaderboard
+            The columnar leaderboard of the challenge.
+        max_age : int, default=None
+            The number of seconds after which the snapshot is refreshed anyway, never if None.
+
+        """
+        self.challenge_id = challenge_id
+        self.challengers_data = challengers_data
+        self.max_age = max_age
+        self.fetched_at = time.time()
+        self.ranks = {}  # rank by user name, computed once per snapshot
+        self.__new_score_expected = False
+        self.__index = None
+
+    @property
+    def index(
+        self,
+    ):
+        """Property: Get the username/team index of the snapshot, built on first use."""
+
+        if self.__index is None:
+            self.__index = LeaderboardIndex(self.challengers_data)
+        return self.__index
+
+    def expect_new_score(self):
+        """Mark the snapshot outdated, a submission has been pushed so the leaderboard will change."""
+
+        self.__new_score_expected = True
+
+    def is_fresh(self):
+        """Check if the snapshot can still answer the leaderboard questions.
+
+        Returns
+        -------
+        fresh : boolean
+            False when a new score is expected or when the snapshot is older than max_age.
+        """
+
+        if self.__new_score_expected:
+            return False
+        return self.max_age is None or (time.time() - self.fetched_at) < self.max_age
+
+    def user_row(self, user_name):
+        """Get the leaderboard row of a user or a team.
+
+        Parameters
+        ----------
+        user_name : string
+            The username, or "TEAM - {title}" for a team.
+
+        Returns
+        -------
+        user_leader_info : list | None
+            The rank, score, name and best submission time of the user, None if the user is not on the leaderboard.
+        """
+
+        position = self.index.position(user_name)
+        if position is None:
+            return None
+        return user_leader_info(self.challengers_data[position])
+
+
+def user_leader_info(participant):
+    """Format a projected leaderboard row as the rank, score, name and best submission time list.
+
+    Parameters
+    ----------
+    participant : dictionary
+        The projected row of the leaderboard.
+
+    Returns
+    -------
+    user_leader_info : list
+        The rank, score, name and best submission time of the user.
+    """
+
+    last_submission = participant["submitted_at"]
+    last_submission = (
+        "" if last_submission is None else pd.to_datetime(str(last_submission)).strftime("%d %B %Y, %H:%M")
+    )
+    return [participant["rank"], participant["score"], participant["name"], last_submission]
+
+
+# Leaderboard index
+class LeaderboardIndex:
+    """Hash index of a leaderboard by username and team id for O(1) rank lookup."""
+
+    def __init__(self, challengers_data):
+        """Index every row of the leaderboard once.
+
+        Parameters
+        ----------
+        challengers_data : Leaderboard | list
+            The columnar leaderboard, or the projected leaderboard rows.
+
+        """
+        leaderboard = Leaderboard.from_participants(challengers_data)
+        self.__positions = {}  # row position by username, "TEAM - {title}" and team id
+        self.__ranks = leaderboard.rank  # rank by row position, 0 for the not yet active challengers
+        for position, name in enumerate(leaderboard.name):
+            self.__positions.setdefault(name, position)
+        for position in np.flatnonzero(leaderboard.team_id != None):  # noqa: E711
+            self.__positions.setdefault(f"team:{leaderboard.team_id[position]}", int(position))
+
+    def __len__(self):
+        return len(self.__ranks)
+
+    def position(self, name):
+        """Get the row position of a username or "TEAM - {title}", None if absent."""
+
+        return self.__positions.get(name)
+
+    def rank_of(self, username):
+        """Get the rank of a user, 0 if the user is not yet ranked on the leaderboard."""
+
+        position = self.__positions.get(username)
+        return 0 if position is None else int(self.__ranks[position])
+
+    def team_rank(self, team_id):
+        """Get the rank of a team from its id, 0 if the team is not yet ranked on the leaderboard."""
+
+        position = self.__positions.get(f"team:{team_id}")
+        return 0 if position is None else int(self.__ranks[position])
+
+    def ranks_of(self, usernames):
+        """Get the rank of several users at once, e.g. the user and the teammates.
+
+        Parameters
+        ----------
+        usernames : list
+            The usernames to look up.
+
+        Returns
+        -------
+        ranks : dictionary
+            The rank by username, 0 for users not yet ranked.
+        """
+
+        return {username: self.rank_of(username) for username in usernames}
+
+    def best_rank(self, usernames):
+        """Get the best rank among several users, 0 if none of them is ranked."""
+
+        ranks = [rank for rank in self.ranks_of(usernames).values() if rank > 0]
+        return min(ranks) if ranks else 0
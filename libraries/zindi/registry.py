@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+from libraries.logging_file import logger
+from libraries.zindi.utils import joined_challenges
+
+
+# Joined challenges registry
+class JoinedRegistry:
+    """On-disk registry of the (account, challenge) pairs already joined, to skip redundant join requests."""
+
+    def __init__(self, account, path=None):
+        """Load the challenges already joined by the account.
+
+        Parameters
+        ----------
+        account : string
+            The username of the signed in user.
+        path : string, default=None
+            The json file of the registry, memory only if None.
+
+        """
+        self.account = account
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__registry = self.__load()
+        self.__refreshed = False
+
+    def __contains__(self, challenge_id):
+        with self.__lock:
+            return challenge_id in self.__registry.get(self.account, [])
+
+    def refresh(self, headers, session=None):
+        """Merge the challenges joined on Zindi into the registry, once per run.
+
+        Parameters
+        ----------
+        headers : dictionary
+            The headers of the request, with the auth token.
+        session : requests.Session, default=None
+            The pooled session to reuse, a new connection is opened if None.
+
+        """
+        with self.__lock:
+            if self.__refreshed:
+                return
+            self.__refreshed = True
+        try:
+            challenge_ids = joined_challenges(headers=headers, session=session)
+        except Exception as e:
+            logger.info(f"Joined challenges not refreshed from Zindi: {e}")
+            return
+        with self.__lock:
+            self.__registry[self.account] = sorted(set(self.__registry.get(self.account, [])) | set(challenge_ids))
+            self.__save()
+
+    def add(self, challenge_id):
+        """Record a challenge as joined by the account."""
+
+        with self.__lock:
+            joined = self.__registry.setdefault(self.account, [])
+            if challenge_id not in joined:
+                joined.append(challenge_id)
+                self.__save()
+
+    def __load(self):
+        """Read the persisted registry."""
+
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as registry_file:
+                return json.load(registry_file)
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable joined challenges registry {self.path}: {e}")
+            return {}
+
+    def __save(self):
+        """Persist the registry, replacing the file atomically."""
+
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as registry_file:
+            json.dump(self.__registry, registry_file)
+        os.replace(temporary_path, self.path)
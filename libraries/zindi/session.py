@@ -0,0 +1,81 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Pooled HTTP session
+class ZindiSession(requests.Session):
+    """Keep-alive HTTP session shared by every Zindi API call of a run."""
+
+    def __init__(self, pool_size=10, pool_block=False, rate_limit=None):
+        """Mount pooled adapters so every request to the same host reuses its TCP/TLS connection.
+
+        Parameters
+        ----------
+        pool_size : int, default=10
+            The maximum number of connections kept alive per host.
+        pool_block : boolean, default=False
+            Wait for a free connection instead of opening an extra one when the pool is full.
+        rate_limit : float, default=None
+            The maximum number of requests per second sent to the same host, unlimited if None.
+
+        """
+        super().__init__()
+        self.pool_size = pool_size
+        self.rate_limit = rate_limit
+        self.__rate_lock = threading.Lock()
+        self.__next_slot = {}  # next allowed request time by host
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, pool_block=pool_block
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        """Send a request, after waiting for the rate limit of its host."""
+
+        if self.rate_limit:
+            self.__wait_turn(urlparse(url).netloc)
+        return super().request(method, url, *args, **kwargs)
+
+    def __wait_turn(self, host):
+        """Sleep until the host can receive another request, requests are spaced by 1 / rate_limit seconds."""
+
+        with self.__rate_lock:
+            now = time.monotonic()
+            slot = max(now, self.__next_slot.get(host, now))
+            self.__next_slot[host] = slot + 1.0 / self.rate_limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    @property
+    def connection_stats(
+        self,
+    ):
+        """Property: Get the number of connections opened and reused by this session.
+
+        Returns
+        -------
+        stats : dictionary
+            The count of requests, opened connections and reused connections.
+        """
+
+        n_requests, n_connections = 0, 0
+        for adapter in set(self.adapters.values()):
+            pools = getattr(adapter, "poolmanager", None)
+            if pools is None:
+                continue
+            for key in list(pools.pools.keys()):
+                pool = pools.pools.get(key)
+                if pool is None:
+                    continue
+                n_requests += pool.num_requests
+                n_connections += pool.num_connections
+        return {
+            "requests": n_requests,
+            "opened": n_connections,
+            "reused": max(n_requests - n_connections, 0),
+        }
@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from libraries.logging_file import logger
+from libraries.zindi.utils import file_sha256
+
+
+# Content-addressed dataset store
+class DatasetStore:
+    """Local store of the datafiles keyed by sha256, shared by every competition and run, LRU evicted."""
+
+    def __init__(self, root, max_bytes=None):
+        """Load the index of the store.
+
+        Parameters
+        ----------
+        root : string
+            The folder of the store, objects are kept in "{root}/objects/{sha256[:2]}/{sha256}".
+        max_bytes : int, default=None
+            The maximum size of the store, the least recently used objects are evicted above it, unbounded if None.
+
+        """
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, "index.json")
+        self.__lock = threading.Lock()
+        self.__index = self.__load()
+
+    @property
+    def size(
+        self,
+    ):
+        """Property: Get the number of bytes of the objects in the store."""
+
+        with self.__lock:
+            return sum(entry["size"] for entry in self.__index["objects"].values())
+
+    def lookup(self, metadata):
+        """Get the sha256 of a remote file already in the store from its size and ETag.
+
+        Parameters
+        ----------
+        metadata : dictionary
+            The remote_metadata of the file.
+
+        Returns
+        -------
+        sha256 : string | None
+            The sha256 of the stored object, None if the file is not in the store.
+        """
+
+        key = self.__validator_key(metadata)
+        if key is None:
+            return None
+        with self.__lock:
+            sha256 = self.__index["validators"].get(key)
+            if sha256 is None or not os.path.isfile(self.__object_path(sha256)):
+                return None
+            return sha256
+
+    def add(self, local_path, metadata=None):
+        """Put a downloaded file in the store, the file is hardlinked, or copied, as an object. A file whose content
+        is already stored, e.g. under another ETag, is replaced by a link to the object.
+
+        Parameters
+        ----------
+        local_path : string
+            The path of the downloaded file.
+        metadata : dictionary, default=None
+            The remote_metadata of the file, to find it again before downloading it.
+
+        Returns
+        -------
+        sha256 : string
+            The sha256 of the stored object.
+        """
+
+        sha256 = file_sha256(local_path)
+        object_path = self.__object_path(sha256)
+        with self.__lock:
+            if not os.path.isfile(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                _link_or_copy(local_path, object_path)
+            elif not os.path.samefile(object_path, local_path):
+                self.__replace_with_object(sha256, local_path)
+            self.__index["objects"][sha256] = {"size": os.path.getsize(object_path), "last_used": time.time()}
+            key = self.__validator_key(metadata)
+            if key is not None:
+                self.__index["validators"][key] = sha256
+            self.__evict(keep=sha256)
+            self.__save()
+        return sha256
+
+    def link(self, sha256, local_path):
+        """Hardlink, or copy, a stored object to a competition folder, replacing the local file.
+
+        Parameters
+        ----------
+        sha256 : string
+            The sha256 of the stored object.
+        local_path : string
+            The path of the file in the competition folder.
+
+        """
+        with self.__lock:
+            self.__replace_with_object(sha256, local_path)
+            self.__index["objects"][sha256]["last_used"] = time.time()
+            self.__save()
+
+    def __replace_with_object(self, sha256, local_path):
+        """Hardlink, or copy, a stored object in place of a local file, the lock is held by the caller."""
+
+        temporary_path = f"{local_path}.link"
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        _link_or_copy(self.__object_path(sha256), temporary_path)
+        os.replace(temporary_path, local_path)
+
+    def __evict(self, keep=None):
+        """Remove the least recently used objects until the store fits in max_bytes."""
+
+        if self.max_bytes is None:
+            return
+        objects = self.__index["objects"]
+        size = sum(entry["size"] for entry in objects.values())
+        for sha256 in sorted(objects, key=lambda sha256: objects[sha256]["last_used"]):
+            if size <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            size -= objects.pop(sha256)["size"]
+            object_path = self.__object_path(sha256)
+            if os.path.isfile(object_path):
+                os.remove(object_path)  # the linked competition files keep their data
+        self.__index["validators"] = {
+            key: sha256 for key, sha256 in self.__index["validators"].items() if sha256 in objects
+        }
+
+    def __object_path(self, sha256):
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    @staticmethod
+    def __validator_key(metadata):
+        """Identify a remote file by its size and ETag, None if the server sent none of them."""
+
+        if metadata is None or not metadata.get("etag") or metadata.get("size") is None:
+            return None
+        return f"{metadata['size']}:{metadata['etag']}"
+
+    def __load(self):
+        """Read the persisted index."""
+
+        index = {"objects": {}, "validators": {}}
+        if not os.path.isfile(self.index_path):
+            return index
+        try:
+            with open(self.index_path, "r") as index_file:
+                index.update(json.load(index_file))
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable dataset store index {self.index_path}: {e}")
+        return index
+
+    def __save(self):
+        """Persist the index, replacing the file atomically."""
+
+        os.makedirs(self.root, exist_ok=True)
+        temporary_path = f"{self.index_path}.tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump(self.__index, index_file)
+        os.replace(temporary_path, self.index_path)
+
+
+def _link_or_copy(source, destination):
+    """Hardlink source to destination, copy it when the filesystem does not allow the link."""
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
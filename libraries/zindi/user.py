@@ -5,19 +5,44 @@ import sys, os
 currentdir = os.path.dirname(os.path.realpath(__file__))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
-from libraries.logging_file import  logger
 from libraries.zindi.utils import *
+from libraries.zindi.session import ZindiSession
+from libraries.zindi.catalog import ChallengeCatalog
+from libraries.zindi.challenge import ChallengeHandle
+from libraries.zindi.registry import JoinedRegistry
+from libraries.zindi.store import DatasetStore
 from getpass import getpass
 
-import pandas as pd
-import requests, datetime
+import threading
+
+
+class _ChallengeState(threading.local):
+    """Selected challenge of the current thread, so that concurrent workers do not overwrite each other."""
+
+    handle = None
 
 
 # Class declaration and init
 class Zindian:
     """Zindi user-friendly account manager."""
 
-    def __init__(self, username, fixed_password=None):
+    def __init__(
+        self,
+        username,
+        fixed_password=None,
+        pool_size=10,
+        catalog_ttl=900,
+        catalog_path=None,
+        leaderboard_max_age=None,
+        rank_page_size=None,
+        rate_limit=None,
+        registry_path=None,
+        download_workers=4,
+        download_segments=1,
+        store_path=None,
+        store_max_bytes=None,
+        dataset_format=None,
+    ):
         """Singin, connect user to the Zindi platform.
 
         Parameters
@@ -26,16 +51,60 @@ class Zindian:
             The challenger's username.
         fixed_password : string, default=None
             The challenger's password, for test.
+        pool_size : int, default=10
+            The number of keep-alive connections shared by every API call.
+        catalog_ttl : int, default=900
+            The number of seconds the challenges catalog is reused before asking the server again.
+        catalog_path : string, default=None
+            The json file where the challenges catalog is kept between runs.
+        leaderboard_max_age : int, default=None
+            The number of seconds a leaderboard snapshot is reused, until a new score is expected if None.
+        rank_page_size : int, default=None
+            Look up the user rank with pages of this size instead of downloading the whole leaderboard, if not None.
+        rate_limit : float, default=None
+            The maximum number of requests per second sent to the same host, unlimited if None.
+        registry_path : string, default=None
+            The json file where the joined challenges are kept between runs.
+        download_workers : int, default=4
+            The number of dataset files downloaded at the same time.
+        download_segments : int, default=1
+            The number of ranges downloaded at the same time for a big dataset file.
+        store_path : string, default=None
+            The folder of the dataset store shared by the competitions, every dataset is downloaded if None.
+        store_max_bytes : int, default=None
+            The maximum size of the dataset store, unbounded if None.
+        dataset_format : {'parquet', 'arrow'}, default=None
+            Convert the downloaded CSV datafiles to this format, not converted if None.
 
         """
+        self.__state = _ChallengeState()
+        self.__session = ZindiSession(pool_size=pool_size, rate_limit=rate_limit)
         self.__headers = {
             "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.116 Safari/537.36"
         }
         self.__base_api = "https://api.zindi.africa/v1/competitions"
+        self.__catalog = ChallengeCatalog(
+            url=self.__base_api,
+            headers=self.__headers,
+            session=self.__session,
+            ttl=catalog_ttl,
+            cache_path=catalog_path,
+        )
         self.__auth_data = self.__signin(
             username, fixed_password
         )  # auth & user data from Zindi server after signin
-        self.__challenge_selected = False
+        self.__leaderboards = {}  # leaderboard snapshot by challenge id
+        self.__leaderboard_max_age = leaderboard_max_age
+        self.__rank_page_size = rank_page_size
+        self.__download_workers = download_workers
+        self.__download_segments = download_segments
+        self.__dataset_format = dataset_format
+        self.__dataset_store = (
+            None if store_path is None else DatasetStore(root=store_path, max_bytes=store_max_bytes)
+        )
+        self.__last_known_ranks = {}  # last rank found by (challenge id, user name)
+        self.__joined = JoinedRegistry(account=self.username, path=registry_path)
+        self.__join_lock = threading.Lock()
 
     # Properties
     @property
@@ -44,64 +113,163 @@ class Zindian:
     ):
         """Property: Get the information about the selected challenge."""
 
-        if self.__challenge_selected:
-            msg = f"\n[ 🟢 ] You are currently enrolled in : {self.__challenge_data['id']} challenge,\n\t{self.__challenge_data['subtitle']}.\n"
-            challenge = self.__challenge_data["id"]
+        handle = self.__state.handle
+        if handle is not None:
+            msg = f"\n[ 🟢 ] You are currently enrolled in : {handle.id} challenge,\n\t{handle.subtitle}.\n"
+            challenge = handle.id
         else:
-            msg = f"\n[ 🔴 ] You have not yet selected any challenge.\n"
+            msg = "\n[ 🔴 ] You have not yet selected any challenge.\n"
             challenge = None
         print(msg)
         return challenge
 
+    @property
+    def connection_stats(
+        self,
+    ):
+        """Property: Get the number of HTTP connections opened and reused during this run."""
+
+        return self.__session.connection_stats
+
+    @property
+    def catalog_stats(
+        self,
+    ):
+        """Property: Get the hit, miss and revalidation counters of the challenges catalog cache."""
+
+        return self.__catalog.stats
+
+    def invalidate_catalog(self):
+        """Forget the cached challenges catalog, the next call will download it again."""
+
+        self.__catalog.invalidate()
+
+    ## Shared with the challenge handles
+    @property
+    def session(
+        self,
+    ):
+        """Property: Get the pooled HTTP session of the user."""
+
+        return self.__session
+
+    @property
+    def base_api(
+        self,
+    ):
+        """Property: Get the url of the competitions api."""
+
+        return self.__base_api
+
+    @property
+    def headers(
+        self,
+    ):
+        """Property: Get the headers of the requests, without the auth token."""
+
+        return self.__headers
+
+    @property
+    def auth_headers(
+        self,
+    ):
+        """Property: Get the headers of the requests, with the auth token."""
+
+        return {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
+
+    @property
+    def username(
+        self,
+    ):
+        """Property: Get the username of the signed in user."""
+
+        return self.__auth_data["user"]["username"]
+
+    @property
+    def leaderboards(
+        self,
+    ):
+        """Property: Get the leaderboard snapshots by challenge id."""
+
+        return self.__leaderboards
+
+    @property
+    def leaderboard_max_age(
+        self,
+    ):
+        """Property: Get the number of seconds a leaderboard snapshot is reused."""
+
+        return self.__leaderboard_max_age
+
+    @property
+    def rank_page_size(
+        self,
+    ):
+        """Property: Get the leaderboard page size of the rank lookup, None to download the whole leaderboard."""
+
+        return self.__rank_page_size
+
+    @property
+    def download_workers(
+        self,
+    ):
+        """Property: Get the number of dataset files downloaded at the same time."""
+
+        return self.__download_workers
+
+    @property
+    def download_segments(
+        self,
+    ):
+        """Property: Get the number of ranges downloaded at the same time for a big dataset file."""
+
+        return self.__download_segments
+
+    @property
+    def dataset_format(
+        self,
+    ):
+        """Property: Get the format the downloaded CSV datafiles are converted to, None if not converted."""
+
+        return self.__dataset_format
+
+    @property
+    def dataset_store(
+        self,
+    ):
+        """Property: Get the content-addressed dataset store shared by the competitions, None if not used."""
+
+        return self.__dataset_store
+
+    @property
+    def last_known_ranks(
+        self,
+    ):
+        """Property: Get the last rank found by (challenge id, user name)."""
+
+        return self.__last_known_ranks
+
+    def __selected(self, action):
+        """Get the handle of the selected challenge, raise if no challenge is selected."""
+
+        handle = self.__state.handle
+        if handle is None:
+            error_msg = f"\n[ 🔴 ] You have to select a challenge before to {action},\n\tuse the select_a_challenge method before.\n"
+            raise Exception(error_msg)
+        return handle
+
     def my_rank(
         self,
         challenge, user_name_for_rank = "" ):
         """Property: Get the user rank on the leaderboard for the selected challenge."""
-        self.__challenge_selected = challenge
-        if self.__challenge_selected:
-            self.leaderboard(challenge,user_name_for_rank, to_print=False)
-            int_rank = self.__rank
-            if int_rank == 0:
-                rank = f"not yet"
-            elif str(int_rank)[-1] == "1":
-                if str(int_rank)[-2] == "1":
-                    rank = f"{int_rank}th"
-                else:
-                    rank = f"{int_rank}st"
-            elif str(int_rank)[-1] == "2":
-                rank = f"{int_rank}nd"
-            elif str(int_rank)[-1] == "3":
-                rank = f"{int_rank}rd"
-            else:
-                rank = f"{int_rank}th"
-            msg = f"\n[ 🟢 ] You are {rank} on the leaderboad of {self.__challenge_data['id']} challenge, Go on...\n"
-        else:
-            msg = f"\n[ 🔴 ] You have not yet selected any challenge.\n"
-            int_rank = 0
-        print(msg)
-        return int_rank
+        if not challenge:
+            print("\n[ 🔴 ] You have not yet selected any challenge.\n")
+            return 0
+        return self.__handle_of(challenge).my_rank(user_name_for_rank)
 
     def availabel_remaining_submission_for_selected_competetion(self,current_selected_challenge) -> dict:
             """ getting submission of today of competetion"""
-            competetion_name = current_selected_challenge
-            authen_dict = {"auth_token": self.__auth_data["auth_token"]}
-            url = f"https://api.zindi.africa/v1/competitions/{competetion_name}/submissions/limits"
-            headers = {
-                "accept": "*/*",
-                "accept-encoding": "gzip, deflate, br, zstd",
-                "accept-language": "en-US,en;q=0.9",
-                "auth-token": f"{authen_dict['auth_token']}",  # Replace with your valid token
-                "origin": "https://zindi.africa",
-                "referer": f"https://zindi.africa/competitions/{competetion_name}/submit",
-                "user-agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36"
-            }
-
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                logger.info(response.json())
-                return response.json()
-            else:
-                print(f"ERROR API FAILED: {response.status_code}, {response.text}")
+            return self.__handle_of(current_selected_challenge).submission_limits()
 
     @property
     def remaining_subimissions(
@@ -114,43 +282,11 @@ class Zindian:
         free_submissions : int, default=n_subimissions_per_day.
             The number of now remaining submissions.
         """
-        if self.__challenge_selected:
-            url = self.__api
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-
-            free_submissions = None
-            n_sub = n_subimissions_per_day(url=url, headers=headers)
-            n_submitted_today = 0
-            self.submission_board(to_print=False)
-            sb_time = pd.DataFrame(self.__sb_data)
-
-            if n_sub > 0:
-                if sb_time.shape[0] != 0:
-                    sb_time = sb_time[
-                        ["id", "status", "created_at", "filename"]
-                    ]  # get useful columns
-                    sb_time["created_at"] = pd.to_datetime(
-                        sb_time["created_at"]
-                    )  # .tz_localize('UTC')
-                    sb_time["now"] = pd.to_datetime(
-                        datetime.datetime.utcnow()
-                    ).tz_localize("UTC")
-                    sb_time["delta"] = sb_time["now"] - sb_time["created_at"]
-                    n_submitted_today = sb_time[
-                        (sb_time.status.isin(["successful", "initial"]))
-                        & (sb_time.delta.dt.days < 1)
-                    ].shape[0]
-                    free_submissions = n_sub - n_submitted_today
-                else:
-                    free_submissions = n_sub
-            else:
-                free_submissions = n_sub
-            msg = f"\n[ 🟢 ] You have {free_submissions} remaining submissions for the challenge {self.__challenge_data['id']}.\n"
-            print(msg)
-        else:
-            msg = f"\n[ 🔴 ] You have not yet selected any challenge.\n"
-            print(msg)
-        return free_submissions
+        handle = self.__state.handle
+        if handle is None:
+            print("\n[ 🔴 ] You have not yet selected any challenge.\n")
+            return None
+        return handle.remaining_subimissions
 
     # Account
     ## Sign In
@@ -178,7 +314,7 @@ class Zindian:
             password = fixed_password
         data = {"username": username, "password": password}
 
-        response = requests.post(url, data=data, headers=self.__headers)
+        response = self.__session.post(url, data=data, headers=self.__headers)
         response = response.json()["data"]
         if "errors" in response:
             error_msg = f"[ 🔴 ] {response['errors']}"
@@ -199,14 +335,69 @@ class Zindian:
         self, reward="all", kind="competition", active="all", fixed_index=None ,open_competetion=True
     ):
         """get opned competetion."""
-        headers = self.__headers
-        url = self.__base_api
-        challenges_data = get_challenges(
-            reward=reward, kind=kind, active=active, url=url, headers=headers,open_competetion=True
+        challenges_data = challenges_frame(
+            self.__catalog.get(reward=reward, kind=kind, active=active),
+            open_competetion=True,
         )
         return challenges_data
 
     # Challenge
+    ## Get a challenge handle
+    def challenge(self, challenge_id, join=True, reward="all", kind="competition", active="all"):
+        """Get a handle on a challenge of the catalog, the user joins it once per run.
+
+        Parameters
+        ----------
+        challenge_id : string
+            The id of the challenge, as in its url.
+        join : boolean, default=True
+            Join the challenge if it is not yet done during this run.
+        reward : {'prize', 'points', 'knowledge' , 'all'}, default='all'
+            The reward filter of the catalog to look in.
+        kind : {'competition', 'hackathon'}, default='competition'
+            The kind filter of the catalog to look in.
+        active : {True, False, 'all'}, default='all'
+            The status filter of the catalog to look in.
+
+        Returns
+        -------
+        handle : ChallengeHandle
+            The handle exposing every operation of the challenge.
+        """
+
+        challenge_data = self.__catalog.find(challenge_id, reward=reward, kind=kind, active=active)
+        if challenge_data is None:
+            error_msg = f"\n[ 🔴 ] The challenge {challenge_id} is not in the Zindi's catalog.\n"
+            raise Exception(error_msg)
+        handle = ChallengeHandle(self, challenge_data)
+        if join:
+            self.__join(handle)
+        return handle
+
+    def __join(self, handle):
+        """Join the challenge of the handle, only if it is not in the joined challenges registry."""
+
+        self.__joined.refresh(headers=self.auth_headers, session=self.__session)
+        with self.__join_lock:
+            if handle.id in self.__joined:
+                return
+            join_challenge(
+                url=f"{handle.api}/participations",
+                headers=self.auth_headers,
+                session=self.__session,
+            )
+            self.__joined.add(handle.id)
+
+    def __handle_of(self, challenge):
+        """Get the handle of the selected challenge if it is the given one, else a not joined handle on it."""
+
+        handle = self.__state.handle
+        if isinstance(challenge, str) and (handle is None or handle.id != challenge):
+            return self.challenge(challenge, join=False)
+        if handle is None:
+            return self.__selected("use it")
+        return handle
+
     ## Select a challenge to participate in
     def select_a_challenge(
         self, reward="all", kind="competition", active="all", fixed_index=None ,open_competetion=True ,comptetion_name=""
@@ -227,47 +418,46 @@ class Zindian:
 
         """
 
-        headers = self.__headers
-        url = self.__base_api
-        challenges_data = get_challenges(
-            reward=reward, kind=kind, active=active, url=url, headers=headers,open_competetion=True
-        )
-        n_challenges = challenges_data.shape[0]
         if comptetion_name:
-            challenge_index = self.get_challenge_index_using_name(challenges_data, comptetion_name)
-        elif fixed_index is None:
-            print_challenges(challenges_data=challenges_data)
-            challenge_index = challenge_idx_selector(n_challenges)
+            challenge_id = comptetion_name
         else:
-            error_msg = f"\n[ 🔴 ] The parameter 'fixed_index' must be an integer in range(0, {n_challenges}) to be valid.\n"
-            try:
-                if isinstance(fixed_index, int) and (fixed_index > -1):
-                    challenge_index = fixed_index
-                    if challenge_index > n_challenges:
-                        raise Exception(error_msg)
-                else:
-                    raise Exception(error_msg)
-            except Exception as e:
-                print(
-                    "\n[ 🔴 ] The parameter 'fixed_index' value must be None or a valid integer.\n"
-                )
-                raise Exception(e)
-        if challenge_index > -1:
-            self.__challenge_data = challenges_data.iloc[challenge_index]
-            self.__api = f"{self.__base_api}/{self.__challenge_data['id']}"
-            self.__challenge_selected = True
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-            url = f"{self.__api}/participations"
-            print(
-                f"\n[ 🟢 ] You choose the challenge : {self.__challenge_data['id']},\n\t{self.__challenge_data['subtitle']}.\n"
-            )
-            join_challenge(
-                url=url,
-                headers=headers,
+            challenges_data = challenges_frame(
+                self.__catalog.get(reward=reward, kind=kind, active=active),
+                open_competetion=True,
             )
+            n_challenges = challenges_data.shape[0]
+            if fixed_index is None:
+                print_challenges(challenges_data=challenges_data)
+                challenge_index = challenge_idx_selector(n_challenges)
+            else:
+                error_msg = f"\n[ 🔴 ] The parameter 'fixed_index' must be an integer in range(0, {n_challenges}) to be valid.\n"
+                try:
+                    if isinstance(fixed_index, int) and (fixed_index > -1):
+                        challenge_index = fixed_index
+                        if challenge_index > n_challenges:
+                            raise Exception(error_msg)
+                    else:
+                        raise Exception(error_msg)
+                except Exception as e:
+                    print(
+                        "\n[ 🔴 ] The parameter 'fixed_index' value must be None or a valid integer.\n"
+                    )
+                    raise Exception(e)
+            if challenge_index < 0:
+                return
+            challenge_id = challenges_data.iloc[challenge_index]["id"]
+        handle = self.challenge(challenge_id, reward=reward, kind=kind, active=active)
+        self.__state.handle = handle
+        print(
+            f"\n[ 🟢 ] You choose the challenge : {handle.id},\n\t{handle.subtitle}.\n"
+        )
+        return handle
 
     ## Download dataset
-    def download_dataset(self, destination=".", make_destination=True):
+    def download_dataset(
+        self, destination=".", make_destination=True, workers=None, sync=True, convert=None, extract=False,
+        filenames=None,
+    ):
         """Download the dataset of the selected challenge.
 
         Parameters
@@ -276,36 +466,28 @@ class Zindian:
             The dataset's destination folder .
         make_destination : boolean, default=True
             Create destination folder if doesn't exist.
+        workers : int, default=None
+            The number of files downloaded at the same time, download_workers if None.
+        sync : boolean, default=True
+            Only download the files new or changed since the last download in destination.
+        convert : {'parquet', 'arrow'}, default=None
+            Convert the CSV datafiles to this format, dataset_format if None.
+        extract : boolean, default=False
+            Extract the zip archives as soon as they are downloaded.
+        filenames : list, default=None
+            Only download the datafiles matching one of these case-insensitive patterns.
 
         """
 
-        if not os.path.isdir(destination):
-            os.makedirs(destination, exist_ok=True)
-        if self.__challenge_selected:
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-            data = {"auth_token": self.__auth_data["auth_token"]}
-            url = self.__api
-
-            response = requests.get(url, headers=headers, data=data)
-            datafiles_ = response.json()["data"]["datafiles"]
-            datafiles = []
-            [
-                datafiles.append(i) for i in datafiles_ if i not in datafiles
-            ]  # remove deplicates
-
-            # DOWNLOAD FILES USING ANOTHER METHOD TO SAVE THE ABILITY OF MULTIPROCESSING
-            [
-                download(
-                    url=f"{url}/files/{data['filename']}",
-                    filename=os.path.join(destination, data["filename"]),
-                    headers=headers,
-                )
-                for data in datafiles
-            ]
-
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to downoad a dataset,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        return self.__selected("downoad a dataset").download_dataset(
+            destination=destination,
+            make_destination=make_destination,
+            workers=workers,
+            sync=sync,
+            convert=convert,
+            extract=extract,
+            filenames=filenames,
+        )
 
     ## Push submission file
     def submit(self, filepaths=[], comments=[]):
@@ -318,50 +500,13 @@ class Zindian:
         comments : list
             The comments of submission files to push.
 
+        Returns
+        -------
+        submission_ids : list
+            The Zindi's submission id of each file, None for a file not submitted.
         """
 
-        if self.__challenge_selected:
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-            url = f"{self.__api}/submissions"
-            # self.submit__ = url
-            allowed_extensions = [
-                "csv",
-            ]
-            if len(comments) < len(filepaths):
-                n_blank_comment = len(filepaths) - len(comments)
-                comments += [""] * n_blank_comment
-
-            for filepath, comment in zip(filepaths, comments):
-                extension = filepath.split(".")[-1].strip().lower()
-                if extension in allowed_extensions:
-                    if os.path.isfile(filepath):
-                        # print(f"[INFO] Submiting file : {filepath} , wait ...")
-                        response = upload(
-                            filepath=filepath,
-                            comment=comment,
-                            url=url,
-                            headers=headers,
-                        )
-                        response = response.json()["data"]
-                        try:
-                            print(
-                                f"\n[ 🔴 ] Something wrong with file :{filepath} ,\n{response['errors']}\n"
-                            )
-                        except:
-                            print(
-                                f"\n[ 🟢 ] Submission ID: {response['id'] } - File submitted : {filepath}\n"
-                            )
-                    else:
-                        print(
-                            f"\n[ 🔴 ] File doesn't exists, please verify this filepath : {filepath}\n"
-                        )
-                else:
-                    print(
-                        f"\n[ 🔴 ] Submission file must be a CSV file ( .csv ),\n\tplease verify this filepath : {filepath}\n"
-                    )
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to push any submission file,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        return self.__selected("push any submission file").submit(filepaths=filepaths, comments=comments)
 
     ## Show leaderboard
     def leaderboard(self,challenge,user_name_for_rank, to_print=True):
@@ -373,37 +518,30 @@ class Zindian:
             Display the leaderboard or not.
 
         """
-        self.__challenge_selected = challenge
-        if self.__challenge_selected:
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-            url = f"{self.__api}/participations"
-            per_page = 100000
-            params_in_url = {
-                "page": 0,
-                "per_page": per_page,
-            }
-
-            response = requests.get(url, headers=headers, params=params_in_url)
-            response = response.json()["data"]
-            if "errors" in response:
-                error_msg = f"\n[ 🔴 ] {response['errors']}\n"
-                raise Exception(error_msg)
-            else:
-                self.__challengers_data = response
-                self.__rank = user_on_lb(
-                    user_name = user_name_for_rank,
-                    challengers_data=self.__challengers_data,
-                    challenge_id=self.__challenge_data["id"],
-                    username=self.__auth_data["user"]["username"],
-                    headers=headers,
-                )
-                if to_print:
-                    print_lb(
-                        challengers_data=self.__challengers_data, user_rank=self.__rank
-                    )
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to get the leaderboard,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        if not challenge:
+            self.__selected("get the leaderboard")
+        return self.__handle_of(challenge).leaderboard(user_name_for_rank, to_print=to_print)
+
+    def leaderboard_snapshot(self, refresh=False):
+        """Get the leaderboard snapshot of the selected challenge, downloaded only when it is not fresh.
+
+        Parameters
+        ----------
+        refresh : boolean, default=False
+            Download the leaderboard even if the snapshot is still fresh.
+
+        Returns
+        -------
+        snapshot : LeaderboardSnapshot
+            The leaderboard of the selected challenge.
+        """
+
+        return self.__selected("get the leaderboard").leaderboard_snapshot(refresh=refresh)
+
+    def rank_paged(self, user_name):
+        """Get the user rank of the selected challenge by fetching small leaderboard pages."""
+
+        return self.__selected("get the leaderboard").rank_paged(user_name)
 
     def get_leaderboard_data(self,user_name) -> list :
             """Get the leaderboard data return list of it most used.
@@ -411,43 +549,12 @@ class Zindian:
             ----------
             challenge,user_name_for_rank
             """
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-            url = f"{self.__api}/participations"
-            per_page = 100000
-            params_in_url = {
-                "page": 0,
-                "per_page": per_page,
-            }
-
-            response = requests.get(url, headers=headers, params=params_in_url)
-            response = response.json()["data"]
-
-            for data in response:
-                try:
-                    score = data.get("best_private_score", data.get("best_public_score"))
-                    rank = data.get("private_rank", data.get("public_rank"))
-                    name = data["user"]["username"] if "user" in data else f"TEAM - {data['team']['title']}"
-                    last_submission = data.get("best_private_submitted_at", data.get("best_public_submitted_at"))
-
-                    last_submission = (
-                        "" if last_submission is None else pd.to_datetime(str(last_submission)).strftime(
-                            "%d %B %Y, %H:%M")
-                    )
-
-                    # Return only the row matching the target username
-                    if name == user_name:
-                        user_leader_info = [rank, score, name, last_submission]
-                        return user_leader_info
-                except Exception as e:
-                    print(e)
-            if "errors" in response:
-                error_msg = f"\n[ 🔴 ] {response['errors']}\n"
-                raise Exception(error_msg)
+            return self.__selected("get the leaderboard").get_leaderboard_data(user_name)
 
 
     ## Show Submission-board
     def submission_board(self, to_print=True):
-        """Get the submission-board for the selected challenge and upadte the private parameters __sb_data for compute remaining submissions.
+        """Get the submission-board for the selected challenge.
 
         Parameters
         ----------
@@ -456,33 +563,7 @@ class Zindian:
 
         """
 
-        # to add : number of submission, available subissions to do
-        if self.__challenge_selected:
-            url = f"{self.__api}/submissions"
-            headers = {**self.__headers, "auth_token": self.__auth_data["auth_token"]}
-
-            params_in_url = {
-                "per_page": 1000
-            }  # per_page : max number of subimission to retrieve
-            response = requests.get(
-                url,
-                headers=headers,
-                data={"auth_token": headers["auth_token"]},
-                params=params_in_url,
-            )
-            print(response)
-            response = response.json()["data"]
-            if "errors" in response:
-                error_msg = f"\n[ 🔴 ] {response['errors']}\n"
-                raise Exception(error_msg)
-            else:
-                self.__sb_data = response
-                # self.sb_data = response # for test
-                if to_print:
-                    print_submission_board(submissions_data=self.__sb_data)
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to get the submission-board,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        return self.__selected("get the submission-board").submission_board(to_print=to_print)
 
     # Team
     ## Create
@@ -498,40 +579,7 @@ class Zindian:
 
         """
 
-        if self.__challenge_selected:
-            headers = {
-                **self.__headers,
-            }
-            url = f"{self.__api}/my_team"
-            data = {"title": team_name, "auth_token": self.__auth_data["auth_token"]}
-
-            response = requests.post(url, headers=headers, data=data)
-            response = response.json()["data"]
-            if ("errors" in response) and (
-                "Leader can only be" not in response["errors"]["base"]
-            ):
-
-                error_msg = f"\n[ 🔴 ] {response['errors']['base']}\n"
-                raise Exception(error_msg)
-            else:
-                if ("errors" in response) and (
-                    "Leader can only be" in response["errors"]["base"]
-                ):
-                    print(f"\n[ 🟢 ] You are already the leader of a team.\n")
-                else:
-                    print(
-                        f"\n[ 🟢 ] Your team is well created as :{response['title']}\n"
-                    )
-                ##### Invite teammates
-                if len(teammates) > 0:
-                    self.team_up(zindians=teammates)
-                else:
-                    print(
-                        "You can send invitation to join your team using teamup function"
-                    )
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to manage your team,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        self.__selected("manage your team").create_team(team_name, teammates=teammates)
 
     ## Team Up
     def team_up(self, zindians=[]):
@@ -544,33 +592,7 @@ class Zindian:
 
         """
 
-        if self.__challenge_selected:
-            headers = {
-                **self.__headers,
-            }
-            data = {"auth_token": self.__auth_data["auth_token"]}
-            url = f"{self.__api}/my_team/invite"
-
-            for zindian in zindians:
-                data = {"username": zindian}
-                response = requests.post(url, headers=headers, data=data)
-                response = response.json()["data"]
-                if "errors" in response:
-                    if "is already invited" in response["errors"]["base"]:
-                        print(
-                            f"\n[ 🟢 ] An invitation has been sent already to join your team to: {zindian}\n"
-                        )
-                    else:
-                        error_msg = f"\n[ 🔴 ] {response['errors']}\n"
-                        raise Exception(error_msg)
-                else:
-                    print(
-                        f"\n[ 🟢 ] An invitation has been sent to join your team to: {zindian}\n"
-                    )
-
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to manage your team,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        self.__selected("manage your team").team_up(zindians=zindians)
 
     ## Disband ... think to add kick function to kick-off some selected teammates... think to add team status (invited users, teammates)
     def disband_team(
@@ -578,20 +600,4 @@ class Zindian:
     ):
         """Disband user team for the selected challenge."""
 
-        if self.__challenge_selected:
-            headers = {
-                **self.__headers,
-            }
-            data = {"auth_token": self.__auth_data["auth_token"]}
-            url = f"{self.__api}/my_team"
-
-            response = requests.delete(url, headers=headers, data=data)
-            response = response.json()["data"]
-            if "errors" in response:
-                error_msg = f"\n[ 🔴 ] {response['errors']}\n"
-                raise Exception(error_msg)
-            else:
-                print(f"\n[ 🟢 ] {response}\n")
-        else:
-            error_msg = f"\n[ 🔴 ] You have to select a challenge before to manage your team,\n\tuse the select_a_challenge method before.\n"
-            raise Exception(error_msg)
+        self.__selected("manage your team").disband_team()
@@ -1,13 +1,36 @@
 import requests, os
+import glob, hashlib, itertools, threading, time
+from concurrent.futures import ThreadPoolExecutor
+try:  # incremental json parser, the whole response is loaded when it is not installed
+    import ijson
+except ImportError:
+    ijson = None
 from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
 from tqdm import tqdm
 import pandas as pd
+from libraries.zindi.leaderboard import LeaderboardIndex
 
 # Utils
 
 ## Download a file
-def download(url="https://", filename="", headers=""):
-    """Download a file with progress bar.
+def download(
+    url="https://",
+    filename="",
+    headers="",
+    session=None,
+    progress=None,
+    segments=1,
+    segment_threshold=256 * 1024 * 1024,
+    checksum=None,
+    metadata=None,
+):
+    """Download a file with progress bar, resuming a previous partial download.
+
+    The file is written to "{filename}.part" and renamed into place only once its size (and checksum if given)
+    is verified. A big file can be split in ranges downloaded at the same time, each written at its own offset of
+    the preallocated part file. The ETag, or Last-Modified, of the file and the ranges layout are kept in
+    "{filename}.part.validator": a partial download of another version of the file or with other ranges is
+    discarded, and a resumed range is only appended if the file has not changed on the server (If-Range).
 
     Parameters
     ----------
@@ -17,27 +40,295 @@ def download(url="https://", filename="", headers=""):
         The local filename of the file to download.
     headers : dictionary
         The headers of the download's request.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+    progress : callable, default=None
+        Called with the number of bytes of each written chunk instead of showing a progress bar for the file.
+    segments : int, default=1
+        The number of ranges downloaded at the same time for a file bigger than segment_threshold.
+    segment_threshold : int, default=256 MB
+        The size in bytes from which a file is downloaded in segments.
+    checksum : string, default=None
+        The expected sha256 hex digest of the file.
+    metadata : dictionary, default=None
+        The remote_metadata of the file if already known, requested when segments > 1 otherwise.
+
+    Returns
+    -------
+    size : int
+        The number of bytes downloaded by this call, the resumed part excluded.
     """
 
-    response = requests.get(
-        url, headers=headers, data={"auth_token": headers["auth_token"]}, stream=True
-    )
-    response.raise_for_status()  # check if there is no error
-    total = int(response.headers.get("content-length", 0))
-    with open(filename, "wb") as file, tqdm(
+    http = requests if session is None else session
+    headers = {**headers, "Accept-Encoding": "identity"}  # byte offsets must match the file on the server
+    part_filename = f"{filename}.part"
+
+    if metadata is None and segments > 1:
+        metadata = remote_metadata(url=url, headers=headers, session=http)
+    total = None if metadata is None else metadata["size"]
+    validator = _range_validator(metadata)
+    segmented = total is not None and segments > 1 and total >= segment_threshold
+    layout = f"{segments} segments of {total} bytes" if segmented else "single range"
+    _discard_stale_parts(part_filename, validator, layout)
+    with open(f"{part_filename}.validator", "w") as validator_file:
+        validator_file.write(f"{validator or ''}\n{layout}")
+    with tqdm(
         desc=filename,
         total=total,
         unit="o",
         unit_scale=True,
         unit_divisor=1024,
+        disable=progress is not None,
     ) as bar:
-        for data in response.iter_content(chunk_size=1024):
-            size = file.write(data)
+
+        def update(size):
             bar.update(size)
+            if progress is not None:
+                progress(size)
+
+        if segmented:
+            written = _download_segments(
+                url=url, filename=part_filename, headers=headers, session=http, total=total,
+                segments=segments, progress=update, validator=validator,
+            )
+        else:
+            written, total = _download_range(
+                url=url, filename=part_filename, headers=headers, session=http, progress=update,
+                validator=validator, size=total,
+            )
+
+    size = os.path.getsize(part_filename)
+    if total is not None and size != total:
+        raise Exception(f"\n[ 🔴 ] {filename} is incomplete : {size} bytes of {total}, run again to resume.\n")
+    if checksum is not None and file_sha256(part_filename) != checksum:
+        os.remove(part_filename)
+        raise Exception(f"\n[ 🔴 ] {filename} checksum does not match, the partial file is removed.\n")
+    os.replace(part_filename, filename)
+    os.remove(f"{part_filename}.validator")
+    return written
+
+
+def _range_validator(metadata):
+    """Get the If-Range validator of a remote file: its strong ETag, else its Last-Modified, None if unknown."""
+
+    if metadata is None:
+        return None
+    etag = metadata.get("etag")
+    if etag and not etag.startswith("W/"):  # a weak ETag cannot validate a range
+        return etag
+    return metadata.get("last_modified")
+
+
+def _discard_stale_parts(part_filename, validator, layout):
+    """Remove the partial files of a previous download of another version of the file or with other ranges."""
+
+    validator_filename = f"{part_filename}.validator"
+    recorded = None
+    if os.path.isfile(validator_filename):
+        with open(validator_filename, "r") as validator_file:
+            recorded = validator_file.read()
+    if recorded == f"{validator or ''}\n{layout}":  # same version, downloaded in the same ranges
+        return
+    for stale in glob.glob(f"{glob.escape(part_filename)}*"):
+        if os.path.isfile(stale):
+            os.remove(stale)
+
+
+## Metadata of a remote file
+def remote_metadata(url, headers, session=None):
+    """Get the size, ETag and Last-Modified of a remote file with a one byte range request.
+
+    Parameters
+    ----------
+    url : string
+        The url of the file.
+    headers : dictionary
+        The headers of the request.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+
+    Returns
+    -------
+    metadata : dictionary
+        The size in bytes of the file, None if the server does not accept range requests, and the ETag and
+        Last-Modified headers, None if absent.
+    """
+
+    http = requests if session is None else session
+    response = http.get(
+        url,
+        headers={**headers, "Range": "bytes=0-0", "Accept-Encoding": "identity"},
+        data={"auth_token": headers["auth_token"]},
+        stream=True,
+    )
+    response.close()
+    response.raise_for_status()  # check if there is no error
+    content_range = response.headers.get("Content-Range", "")
+    size = content_range.split("/")[-1].strip() if response.status_code == 206 else ""
+    return {
+        "size": int(size) if size.isdigit() else None,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def _download_range(url, filename, headers, session, progress, validator=None, size=None):
+    """Append the end of a remote file to a local file, from the local size.
+
+    A resumed range is sent with If-Range: validator, the server sends the whole file instead if it has changed.
+    Returns the number of bytes written and the expected final size of the local file, None if unknown.
+    """
+
+    offset = os.path.getsize(filename) if os.path.isfile(filename) else 0
+    request_headers = dict(headers)
+    if offset > 0:
+        request_headers["Range"] = f"bytes={offset}-"
+        if validator is not None:
+            request_headers["If-Range"] = validator
+    response = session.get(
+        url, headers=request_headers, data={"auth_token": headers["auth_token"]}, stream=True
+    )
+    if response.status_code == 416:
+        response.close()
+        if size is not None and offset == size:  # nothing left after the local bytes
+            return 0, offset
+        os.remove(filename)  # bigger than the remote file, or of an unknown size : start over
+        return _download_range(url, filename, headers, session, progress, validator=validator, size=size)
+    response.raise_for_status()  # check if there is no error
+
+    mode = "ab"
+    if response.status_code == 200 and offset > 0:
+        mode, offset = "wb", 0  # range ignored by the server, or file changed since the partial download
+    length = response.headers.get("content-length")
+    expected = None if length is None else offset + int(length)
+
+    with open(filename, mode) as file:
+        written = _stream(response, file, progress)
+    return written, expected
+
+
+def _download_segment(url, filename, headers, session, progress, start, end, validator=None):
+    """Write the bytes [start, end] of a remote file at their offset of the preallocated local file.
+
+    The number of bytes already written is kept in "{filename}.{start}", the segment is resumed from there.
+    Returns the number of bytes written.
+    """
+
+    done_filename = f"{filename}.{start}"
+    done = 0
+    if os.path.isfile(done_filename):
+        with open(done_filename, "r") as done_file:
+            done = int(done_file.read() or 0)
+    if start + done > end:
+        return 0  # segment already complete
+    request_headers = {**headers, "Range": f"bytes={start + done}-{end}"}
+    if done > 0 and validator is not None:
+        request_headers["If-Range"] = validator
+    response = session.get(
+        url, headers=request_headers, data={"auth_token": headers["auth_token"]}, stream=True
+    )
+    response.raise_for_status()  # check if there is no error
+    if response.status_code != 206:  # the whole file instead of the segment : changed on the server
+        response.close()
+        for stale in glob.glob(f"{glob.escape(filename)}*"):
+            os.remove(stale)
+        raise Exception(f"\n[ 🔴 ] {filename} was not resumed, the file changed on the server, run again.\n")
+
+    def record(size):
+        nonlocal done
+        file.flush()  # the bytes are written before they are counted
+        done += size
+        with open(done_filename, "w") as done_file:
+            done_file.write(str(done))
+        progress(size)
+
+    with open(filename, "r+b") as file:
+        file.seek(start + done)
+        return _stream(response, file, record)
+
+
+def _stream(response, file, progress):
+    """Write the body of a streamed response to a file, return the number of bytes written."""
+
+    written = 0
+    chunk_size = 64 * 1024
+    while True:
+        started = time.monotonic()
+        data = response.raw.read(chunk_size, decode_content=True)
+        if not data:
+            break
+        written += file.write(data)
+        progress(len(data))
+        # adapt the chunk size to the throughput : few python calls on fast links, small reads on slow ones
+        elapsed = time.monotonic() - started
+        if elapsed < 0.05 and chunk_size < 8 * 1024 * 1024:
+            chunk_size *= 2
+        elif elapsed > 0.5 and chunk_size > 16 * 1024:
+            chunk_size //= 2
+    response.close()
+    return written
+
+
+def _download_segments(url, filename, headers, session, total, segments, progress, validator=None):
+    """Download a remote file in ranges at the same time, each written at its offset of the preallocated file."""
+
+    bounds = [total * i // segments for i in range(segments + 1)]
+    if not os.path.isfile(filename) or os.path.getsize(filename) != total:
+        for stale in glob.glob(f"{glob.escape(filename)}.*"):
+            if not stale.endswith(".validator"):
+                os.remove(stale)  # the counts of bytes written do not match the file anymore
+        with open(filename, "wb") as file:
+            file.truncate(total)
+    lock = threading.Lock()
+
+    def locked_progress(size):
+        with lock:
+            progress(size)
+
+    with ThreadPoolExecutor(max_workers=segments, thread_name_prefix="segment") as executor:
+        futures = [
+            executor.submit(
+                _download_segment,
+                url=url,
+                filename=filename,
+                headers=headers,
+                session=session,
+                progress=locked_progress,
+                start=bounds[i],
+                end=bounds[i + 1] - 1,
+                validator=validator,
+            )
+            for i in range(segments)
+        ]
+        written = sum(future.result() for future in futures)
+
+    for i in range(segments):
+        done_filename = f"{filename}.{bounds[i]}"
+        done = 0
+        if os.path.isfile(done_filename):
+            with open(done_filename, "r") as done_file:
+                done = int(done_file.read() or 0)
+        if done != bounds[i + 1] - bounds[i]:
+            raise Exception(f"\n[ 🔴 ] Segment {i} of {filename} is incomplete, run again to resume.\n")
+    for i in range(segments):
+        if os.path.isfile(f"{filename}.{bounds[i]}"):
+            os.remove(f"{filename}.{bounds[i]}")
+    return written
+
+
+## Hash of a file
+def file_sha256(filename):
+    """Get the sha256 hex digest of a local file, read by blocks of 8 MB."""
+
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(8 * 1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 # Upload a file
-def upload(filepath, comment, url, headers):
+def upload(filepath, comment, url, headers, session=None):
     """Upload a file with progress bar.
 
     Parameters
@@ -50,6 +341,8 @@ def upload(filepath, comment, url, headers):
         The url of the file to upload.
     headers : dictionary
         The headers of the upload's request.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
 
     Returns
     -------
@@ -80,7 +373,8 @@ def upload(filepath, comment, url, headers):
             "Content-Type": multipart_monitor.content_type,
         }
 
-        response = requests.post(
+        http = requests if session is None else session
+        response = http.post(
             url,
             data=multipart_monitor,
             params={"auth_token": headers["auth_token"]},
@@ -166,8 +460,8 @@ def print_lb(challengers_data, user_rank):
 
     Parameters
     ----------
-    challengers_data : dictionary | json
-        The json's response of the request to get informations about the leaderboard.
+    challengers_data : Leaderboard | list
+        The columnar leaderboard, or the leaderboard rows projected with project_participant.
     user_rank : int
         The rank of the user on the leaderboard of a challenge.
     """
@@ -202,34 +496,14 @@ def print_lb(challengers_data, user_rank):
     )
     # for data in challengers_data:
     for i in range(len(challengers_data)):
-        data = challengers_data[i]  # data - each row of the leaderboard
+        data = challengers_data[i]  # data - each projected row of the leaderboard
         try:
-            score = (
-                data["best_private_score"]
-                if "best_private_score" in data
-                else data["best_public_score"]
-            )  # Best submission's score
-            rank = (
-                data["private_rank"] if "private_rank" in data else data["public_rank"]
-            )  # Rank on leaderboard
-            name = (
-                data["user"]["username"]
-                if "user" in data
-                else f"TEAM - {data['team']['title']}"
-            )  # Name of user or team
-            n_submission = data["submission_count"]
-            last_submission = (
-                data["best_private_submitted_at"]
-                if "best_private_submitted_at" in data
-                else data["best_public_submitted_at"]
-            )
-            check = str(last_submission) == str(
-                None
-            )  # conditioin to set last_submission value
+            rank = data["rank"]  # Rank on leaderboard
+            name = data["name"]  # Name of user or team
             last_submission = (
                 ""
-                if check == True
-                else pd.to_datetime(str(last_submission)).strftime("%d %B %Y, %H:%M")
+                if data["submitted_at"] is None
+                else pd.to_datetime(str(data["submitted_at"])).strftime("%d %B %Y, %H:%M")
             )
             # Check rank to exclude not yet active challengers
             if rank != None:
@@ -241,9 +515,9 @@ def print_lb(challengers_data, user_rank):
                 print(
                     "|{:^6}|{:^20.20}|{:^44.44}|{:^12.12}|{:^12}".format(
                         str(rank),
-                        str(score),
+                        str(data["score"]),
                         str(name),
-                        str(n_submission),
+                        str(data["submission_count"]),
                         str(last_submission),
                     )
                 )
@@ -350,7 +624,7 @@ def print_submission_board(submissions_data):
 
 
 ## Join challenge
-def join_challenge(url, headers, code=False):
+def join_challenge(url, headers, code=False, session=None):
     """Formated print the Zindi's challenge submission-board as table.
 
     Parameters
@@ -359,17 +633,20 @@ def join_challenge(url, headers, code=False):
         The url of the selected challenge.
     headers : dictionary
         The headers of the request to participate in a challenge.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
     """
 
+    http = requests if session is None else session
     # {secret_code: "cccccccccc"}
     if not code:
-        response = requests.post(
+        response = http.post(
             url=url, headers=headers, data={"auth_token": headers["auth_token"]}
         )
     else:
         secret_code = input("Enter the secret code to join the challenge.\n>>")
         params = {"secret_code": secret_code}
-        response = requests.post(url=url, headers=headers, params=params)
+        response = http.post(url=url, headers=headers, params=params)
 
     response = response.json()["data"]
     if "errors" in response:  # raise error if request failed
@@ -378,7 +655,7 @@ def join_challenge(url, headers, code=False):
             # print(f"\n[ 🟢 ] {error}\n")
             pass
         elif error == "This competition requires a secret code to join.":
-            join_challenge(url, headers, code=True)
+            join_challenge(url, headers, code=True, session=session)
         else:
             msg_error = f"\n[ 🔴 ] {error}\n"
             raise Exception(msg_error)
@@ -390,7 +667,9 @@ def join_challenge(url, headers, code=False):
 
 
 ## Get available challenges
-def get_challenges(reward="all", kind="competition", active="all", url="", headers="", open_competetion=True):
+def get_challenges(
+    reward="all", kind="competition", active="all", url="", headers="", open_competetion=True, session=None
+):
     """Get the available Zindi's challenges using filter options.
 
     Parameters
@@ -406,6 +685,8 @@ def get_challenges(reward="all", kind="competition", active="all", url="", heade
         The url of the selected challenge.
     headers : dictionary
         The headers of the request to participate in a challenge.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
 
     Returns
     -------
@@ -413,6 +694,60 @@ def get_challenges(reward="all", kind="competition", active="all", url="", heade
         The response of the request to get informations about the available challenges.
     """
 
+    # request
+    http = requests if session is None else session
+    sorting_params = challenge_sorting_params(reward=reward, kind=kind, active=active)
+    response = http.get(url, headers=headers, params=sorting_params)
+    response = response.json()["data"]
+    return challenges_frame(response, open_competetion=open_competetion)
+
+
+## Challenges request params
+def challenge_sorting_params(reward="all", kind="competition", active="all"):
+    """Get the params of the challenges request from the filter options.
+
+    Parameters
+    ----------
+    reward : {'prize', 'points', 'knowledge' , 'all'}, default='all'
+        The reward of the challenges for top challengers.
+    kind : {'competition', 'hackathon'}, default='competition'
+        The kind of the challenges.
+    active : {True, False, 'all'}, default='all'
+        The status of the challenges.
+
+    Returns
+    -------
+    sorting_params : dictionary
+        The params to pass in the url of the challenges request.
+    """
+
+    # check validity of challenge sorting's values
+    reward = (
+        "" if reward.lower() not in ["prize", "points", "knowledge"] else reward.lower()
+    )
+    kind = "competition" if kind.lower() not in ["competition", "hackathon"] else kind.lower()
+    active = "" if active.lower() not in [True, False] else int(active)
+    # join sorting params in a dictionary which will be passed in the url
+    return dict(page=0, per_page=800, prize=reward, kind=kind, active=active)
+
+
+## Challenges table
+def challenges_frame(response, open_competetion=True):
+    """Build the challenges table from the data of the challenges request.
+
+    Parameters
+    ----------
+    response : list | dictionary
+        The "data" part of the json's response of the challenges request.
+    open_competetion : boolean, default=True
+        Keep only the challenges which are open.
+
+    Returns
+    -------
+    challenges_data : pd.DataFrame
+        The informations about the available challenges.
+    """
+
     to_show_challenge_data = [
         "id",
         "kind",
@@ -425,19 +760,6 @@ def get_challenges(reward="all", kind="competition", active="all", url="", heade
         "open",
     ]
     challenges_data = pd.DataFrame()
-
-    # check validity of challenge sorting's values
-    reward = (
-        "" if reward.lower() not in ["prize", "points", "knowledge"] else reward.lower()
-    )
-    kind = "competition" if kind.lower() not in ["competition", "hackathon"] else kind.lower()
-    active = "" if active.lower() not in [True, False] else int(active)
-    # join sorting params in a dictionary which will be passed in the url
-    sorting_params = dict(page=0, per_page=800, prize=reward, kind=kind, active=active)
-
-    # request
-    response = requests.get(url, headers=headers, params=sorting_params)
-    response = response.json()["data"]
     try:  # raise error if request failed
         print(response["errors"])
     except:  # else go on in processing
@@ -487,7 +809,7 @@ def challenge_idx_selector(n_challenges):
 
 
 ##  Info about the challenges user participate in
-def participations(challenge_id, headers):
+def participations(challenge_id, headers, session=None):
     """Check if user is in team for a the Zindi's challenges.
 
     Parameters
@@ -496,6 +818,8 @@ def participations(challenge_id, headers):
         The id of the selected challenge.
     headers : dictionary
         The headers of the request to participate in a challenge.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
 
     Returns
     -------
@@ -503,66 +827,279 @@ def participations(challenge_id, headers):
         The response of the request to get informations about the available challenges.
     """
     url = "https://api.zindi.africa/v1/participations"
-    response = requests.get(url, headers=headers)
+    http = requests if session is None else session
+    response = http.get(url, headers=headers)
     response.raise_for_status()  # check if there is no error
     response = response.json()["data"]
     team_id = response[challenge_id]["team_id"]
     return team_id
 
 
+##  Challenges the user participate in
+def joined_challenges(headers, session=None):
+    """Get the ids of the challenges the user has already joined.
+
+    Parameters
+    ----------
+    headers : dictionary
+        The headers of the request, with the auth token.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+
+    Returns
+    -------
+    challenge_ids : list
+        The ids of the joined challenges.
+    """
+    url = "https://api.zindi.africa/v1/participations"
+    http = requests if session is None else session
+    response = http.get(url, headers=headers)
+    response.raise_for_status()  # check if there is no error
+    response = response.json()["data"]
+    return list(response) if isinstance(response, (dict, list)) and "errors" not in response else []
+
+
+## Leaderboard rows
+def project_participant(data):
+    """Keep only the leaderboard fields used by the robot from a participations row.
+
+    Parameters
+    ----------
+    data : dictionary
+        One row of the json's response of the request to get informations about the leaderboard.
+
+    Returns
+    -------
+    participant : dictionary
+        The rank, score, name, submission_count, submitted_at and team_id of the row.
+    """
+
+    rank = data["private_rank"] if "private_rank" in data else data.get("public_rank")
+    score = (
+        data["best_private_score"] if "best_private_score" in data else data.get("best_public_score")
+    )
+    submitted_at = (
+        data["best_private_submitted_at"]
+        if "best_private_submitted_at" in data
+        else data.get("best_public_submitted_at")
+    )
+    team = data.get("team") or {}
+    name = data["user"]["username"] if data.get("user") else f"TEAM - {team.get('title')}"
+    return {
+        "rank": rank,
+        "score": score,
+        "name": name,
+        "submission_count": data.get("submission_count"),
+        "submitted_at": submitted_at,
+        "team_id": team.get("id"),
+    }
+
+
+## Stream the leaderboard rows
+def iter_participations(url, headers, session=None, page=0, per_page=100000):
+    """Iterate the projected rows of a challenge leaderboard while it is downloaded.
+
+    Parameters
+    ----------
+    url : string
+        The participations url of the selected challenge.
+    headers : dictionary
+        The headers of the leaderboard's request.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+    page : int, default=0
+        The page of the leaderboard to get.
+    per_page : int, default=100000
+        The number of rows by page.
+
+    Yields
+    ------
+    participant : dictionary
+        The projected row, see project_participant.
+    """
+
+    http = requests if session is None else session
+    params_in_url = {
+        "page": page,
+        "per_page": per_page,
+    }
+    response = http.get(url, headers=headers, params=params_in_url, stream=ijson is not None)
+    try:
+        if ijson is None or response.status_code != 200:
+            rows = response.json()["data"]
+            if "errors" in rows:
+                error_msg = f"\n[ 🔴 ] {rows['errors']}\n"
+                raise Exception(error_msg)
+        else:
+            response.raw.decode_content = True  # gzip is decoded while reading
+            rows = _stream_rows(ijson.parse(response.raw, use_float=True))
+        for data in rows:
+            yield project_participant(data)
+    finally:
+        response.close()  # give the connection back to the pool, even on early stop
+
+
+def _stream_rows(events):
+    """Iterate the rows of the "data" array of a parsed response, raise its errors if "data" is not an array."""
+
+    for prefix, event, value in events:
+        if prefix != "data":
+            continue
+        events = itertools.chain([(prefix, event, value)], events)  # "data" is parsed from its first event
+        if event == "start_array":
+            yield from ijson.items(events, "data.item")
+            return
+        data = next(ijson.items(events, "data"))
+        raise Exception(f"\n[ 🔴 ] {data['errors'] if isinstance(data, dict) and 'errors' in data else data}\n")
+    raise Exception("\n[ 🔴 ] The leaderboard response has no data.\n")
+
+
+## Find a row of the leaderboard
+def find_participant(url, headers, user_name, session=None):
+    """Get the leaderboard row of a user, the download stops as soon as the row is parsed.
+
+    Parameters
+    ----------
+    url : string
+        The participations url of the selected challenge.
+    headers : dictionary
+        The headers of the leaderboard's request.
+    user_name : string
+        The username, or "TEAM - {title}" for a team.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+
+    Returns
+    -------
+    participant : dictionary | None
+        The projected row of the user, None if the user is not on the leaderboard.
+    """
+
+    rows = iter_participations(url=url, headers=headers, session=session)
+    try:
+        for participant in rows:
+            if participant["name"] == user_name:
+                return participant
+    finally:
+        rows.close()
+    return None
+
+
+## Find a row of the leaderboard page by page
+def find_participant_paged(url, headers, user_names, session=None, per_page=100, hint_rank=None):
+    """Get the leaderboard row of a user by fetching small pages, starting from the last known rank if any.
+
+    Parameters
+    ----------
+    url : string
+        The participations url of the selected challenge.
+    headers : dictionary
+        The headers of the leaderboard's request.
+    user_names : list
+        The usernames, or "TEAM - {title}", to look for; the first one found is returned.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+    per_page : int, default=100
+        The number of rows by page.
+    hint_rank : int, default=None
+        The last known rank of the user, the lookup starts on its page and spreads to the next ones.
+
+    Returns
+    -------
+    participant : dictionary | None
+        The projected row of the user, None if the user is not on the leaderboard.
+    n_pages : int
+        The number of pages fetched.
+    """
+
+    def fetch(page):
+        return list(iter_participations(url=url, headers=headers, session=session, page=page, per_page=per_page))
+
+    def search(rows):
+        for participant in rows:
+            if participant["name"] in user_names:
+                return participant
+        return None
+
+    n_pages = 0
+    visited = set()
+    if hint_rank:  # look around the page of the last known rank, closest pages first
+        start = (int(hint_rank) - 1) // per_page
+        last_page = None  # first page found empty, the leaderboard stops before
+        for distance in range(0, 3):
+            for page in sorted({start - distance, start + distance}):
+                if page < 0 or page in visited or (last_page is not None and page >= last_page):
+                    continue
+                visited.add(page)
+                rows = fetch(page)
+                n_pages += 1
+                if not rows:
+                    last_page = page if last_page is None else min(last_page, page)
+                    continue
+                participant = search(rows)
+                if participant is not None:
+                    return participant, n_pages
+
+    # scan from the top of the leaderboard until the user or the last page
+    page = 0
+    while True:
+        if page not in visited:
+            rows = fetch(page)
+            n_pages += 1
+            if not rows:
+                return None, n_pages
+            participant = search(rows)
+            if participant is not None:
+                return participant, n_pages
+            if len(rows) < per_page:
+                return None, n_pages
+        page += 1
+
+
 ## Info about user position on lb
-def user_on_lb(user_name ,challengers_data, challenge_id, username, headers):
+def user_on_lb(user_name ,challengers_data, challenge_id, username, headers, session=None, index=None):
     """Get rank of user on the leaderboard for a the Zindi's challenges.
 
     Parameters
     ----------
-    challengers_data : dictionary | json
-        The json's response of the request to get informations about the leaderboard.
+    user_name : string | list
+        The username(s) to look up, e.g. the user and the teammates. The team rank is used if empty.
+    challengers_data : Leaderboard | list
+        The columnar leaderboard, or the leaderboard rows projected with project_participant.
     challenge_id : string
         The id of the selected challenge.
     username : string
         The username of the user.
     headers : dictionary
         The headers of the request to participate in a challenge.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
+    index : LeaderboardIndex, default=None
+        The prebuilt index of the leaderboard, built from challengers_data if None.
 
     Returns
     -------
     user_rank : int
         The rank of the user on the leaderboard of a challenge.
     """
-    df_lb = pd.DataFrame(challengers_data)  # DataFrame verion of the leaderboard
-    df_lb = df_lb[
-        (df_lb.public_rank != None)
-    ]  # filter to use only leaderboard part with the active challengers
+    index = LeaderboardIndex(challengers_data) if index is None else index
     try:
         if user_name:
-            user = df_lb[
-                df_lb["user"]
-                .astype(str)
-                .str.contains(
-                    username,
-                )
-            ]  # na=False, case=True, regex=False
-            user_index = user.index.values[0].astype(int)
+            usernames = [user_name] if isinstance(user_name, str) else list(user_name)
+            user_rank = index.best_rank(usernames)
+            if user_rank == 0 and username not in usernames:
+                user_rank = index.rank_of(username)
         # Team
         else:
-            team_id = participations(challenge_id=challenge_id, headers=headers)
-            my_team = df_lb[
-                df_lb["team"]
-                .astype(str)
-                .str.contains(
-                    team_id,
-                )
-            ]
-            user_index = my_team.index.values[0].astype(int)
-        user_rank = user_index + 1
+            team_id = participations(challenge_id=challenge_id, headers=headers, session=session)
+            user_rank = index.team_rank(team_id)
     except:
         user_rank = 0  # rank initialization if user is not yet active for the challenge
     return user_rank
 
 
 ## Info about number of submissions to do by day
-def n_subimissions_per_day(url, headers):
+def n_subimissions_per_day(url, headers, session=None):
     """Get the number of submissions we can make per day for the selected challenge.
 
     Parameters
@@ -571,13 +1108,16 @@ def n_subimissions_per_day(url, headers):
         The reward of the challenges for top challengers.
     headers : dictionary ,
         The headers of the request.
+    session : requests.Session, default=None
+        The pooled session to reuse, a new connection is opened if None.
     Returns
     -------
     n_sub : int, default=0 : Means error during info retrieval.
         The number of submissions we can make per day.
     """
 
-    response = requests.get(url=url, headers=headers)
+    http = requests if session is None else session
+    response = http.get(url=url, headers=headers)
     response = response.json()["data"]
     for info in response["pages"]:
         if info["title"] == "Rules":
@@ -1,15 +1,21 @@
 import os
 import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from libraries.Config import CONFIG
 from libraries.logging_file import logger
-from libraries.zindi.user import Zindian
-import pandas as pd
+from libraries.score_poller import ScorePoller
+from libraries.submission_journal import SubmissionJournal
+from libraries.submission_ledger import SubmissionLedger
+from libraries.submission_pipeline import SubmissionPipeline
+from libraries.submission_validator import SubmissionValidator
 
 class ZindiProcessing:
     """Automation of zindi site."""
 
     def __init__(self,user, credentials, show_leaderboard, show_rank,
-                 upload_submission_file, download_dataset, daily_submission_remaining,report_dataframe):
+                 upload_submission_file, download_dataset, daily_submission_remaining,report_dataframe, workers=1, scheduler=None):
         self.credentials = credentials
         self.credential = credentials
         self.print_leader_board_for_selected_competetion = show_leaderboard
@@ -20,6 +26,21 @@ class ZindiProcessing:
         self.daily_submission_limit_data = None
         self.report_dataframe = report_dataframe
         self.user = user
+        self.workers = workers  # number of competitions processed concurrently
+        self.ledger = SubmissionLedger(path=CONFIG.Submissions.ledger_path)
+        self.journal = SubmissionJournal(path=CONFIG.Submissions.journal_path)
+        self.scheduler = scheduler  # files planned within the daily quotas, every file of the folder if None
+        self.validator = SubmissionValidator(sample_folder=CONFIG.Submissions.sample_submission_folder,
+                                             sample_submissions=CONFIG.Submissions.sample_submissions,
+                                             chunk_rows=CONFIG.Submissions.validation_chunk_rows,
+                                             workers=CONFIG.Submissions.validation_workers
+                                             ) if CONFIG.Submissions.validate_submissions else None
+        self.report_lock = threading.Lock()
+        self.scores = {}  # (score, rank after scoring, status) by submission id, until its report row is written
+        self.score_poller = ScorePoller(user, on_scored=self.attach_score, user_name_for_rank="MuhammadQasimShabeer",
+                                        initial_delay=CONFIG.Submissions.score_poll_initial_seconds,
+                                        max_delay=CONFIG.Submissions.score_poll_max_seconds,
+                                        max_wait=CONFIG.Submissions.score_wait_seconds)
 
 
 
@@ -31,66 +52,251 @@ class ZindiProcessing:
                                                          fixed_index=None, open_competetion=True)
         logger.info(f"Opened_competitions {open_challenge_data['id'].tolist()}")
 
-        for current_selected_challenge in selected_competition_list:
-            self.user.select_a_challenge(reward="all", kind="competition", fixed_index=None, open_competetion=True,
-                                    comptetion_name=current_selected_challenge)
-            current_selected_challenge = self.user.which_challenge
-            logger.info(f"Processing Competition : {current_selected_challenge}")
-
-            daily_remaining_submission_data = self.user.availabel_remaining_submission_for_selected_competetion(
-                current_selected_challenge)
-
-            leader_board_data =self.user.get_leaderboard_data(user_name="MuhammadQasimShabbeer")
-
-            if self.print_user_daily_remaining_submission_competetion:
-                logger.info(f"before submission file posting remaining submission {daily_remaining_submission_data['data']['today']}")
-
-
-            if self.print_leader_board_for_selected_competetion:
-                self.user.leaderboard(current_selected_challenge, user_name_for_rank="MuhammadQasimShabeer")
-
-            if self.print_user_rank_for_selected_competetion:
-                rank = self.user.my_rank(current_selected_challenge, user_name_for_rank="MuhammadQasimShabeer")
-                logger.info(f" your current rank in this competetion is {rank}")
-
-            if self.download_competetion_dataset_for_selected_challenge:
-                self.user.download_dataset(destination="output")  # Download the dataset of the selected challenge
-                logger.info(f"data is download successfully for {current_selected_challenge}")
-                # # user.submission_board()
-
-            if self.submit_submission_file_for_selected_competetion:
-                logger.info(f"Starting Submissions posting for {current_selected_challenge}")
-                competition_directory = os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder,
-                                                     current_selected_challenge)
-
-                submission_files = [
-                        os.path.join(str(competition_directory), f)
-                        for f in os.listdir(str(competition_directory))
-                        if f.endswith(".csv")
-                    ]
-                logger.info(f"Total submission files {len(submission_files)} for competetion in Submission In Progress")
-                for submission_file in submission_files:
-                    self.user.submit(filepaths=[submission_file], comments=['API  submission'])
-                    rank_after_submission = self.user.my_rank(current_selected_challenge, user_name_for_rank="MuhammadQasimShabeer")
-                    daily_limit_data_after_submission = self.user.availabel_remaining_submission_for_selected_competetion(
-                            current_selected_challenge)
-
-                    today_remaining = daily_limit_data_after_submission['data']['today']
-                    today_submitted = daily_limit_data_after_submission['data']['submitted_today']
-
-                    report_dataframe_new_row = {
-                        "Competetion Name":current_selected_challenge,
-                        "today_remaining_submission":today_remaining,
-                        "today_total_submitted": today_submitted,
-                        "Best Score": leader_board_data[1] ,
-                        "Best rank": leader_board_data[0],
-                        "user name" : leader_board_data[2],
-                        "Best submission time" : leader_board_data[3],
-                        "rank after submission": rank_after_submission,
-                    }
-
-                    self.report_dataframe.loc[len(self.report_dataframe)] = report_dataframe_new_row
-            logger.info(f"Submission posting Completed {current_selected_challenge}")
-        self.report_dataframe.to_csv(CONFIG.ReportsFiles.submission_posted_report, index=False)
-        logger.info(f"========== Reported Generated Complete ================")
+        if CONFIG.Submissions.pipeline and self.submit_submission_file_for_selected_competetion:
+            self.run_pipeline(selected_competition_list)
+            return
 
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="competition") as executor:
+                # map keeps the order of the selected competitions, so the report order does not depend on timing
+                competitions_report_rows = list(executor.map(self.process_competition, selected_competition_list))
+        else:
+            competitions_report_rows = [self.process_competition(current_selected_challenge)
+                                        for current_selected_challenge in selected_competition_list]
+
+        for report_rows in competitions_report_rows:
+            self.append_report_rows(report_rows)
+        logger.info("========== Reported Generated Complete ================")
+
+    def run_pipeline(self, selected_competition_list: list) -> None:
+        """Submit through the validate -> upload -> score -> report pipeline, the report is written row by row."""
+        with SubmissionPipeline(self, queue_size=CONFIG.Submissions.pipeline_queue_size,
+                                validate_workers=CONFIG.Submissions.pipeline_validate_workers,
+                                upload_workers=CONFIG.Submissions.pipeline_upload_workers) as pipeline:
+
+            def feed():
+                for competition in selected_competition_list:
+                    for submission_file in self.competition_submission_files(competition):
+                        pipeline.put(competition, submission_file)  # blocks while the validation is full
+
+            def prepare(competition):
+                try:  # the challenge, limits and leaderboard row are shared with the stages
+                    state = pipeline.competition(competition)
+                    self.process_competition(competition, submit=False, competition_data=(
+                        state["challenge"], state["limits"], state["leader_board_data"]))
+                except Exception as e:
+                    logger.error(f"Processing of {competition} failed: {e}")
+
+            feeder = threading.Thread(target=feed, name="feed")
+            feeder.start()
+            # leaderboard, rank and dataset while files flow, a slow competition does not hold up the others
+            with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="competition") as executor:
+                list(executor.map(prepare, selected_competition_list))
+            feeder.join()
+
+        if self.scheduler is not None:  # once the pipeline is closed, no duplicate can release a deferred file
+            for competition in selected_competition_list:
+                deferred_files = self.scheduler.deferred(competition)
+                if not deferred_files:
+                    continue
+                state = pipeline.competition(competition)  # the limits are refreshed after each upload
+                self.append_report_rows([self.report_row(
+                    competition, state["limits"], state["leader_board_data"], None, submission_file,
+                    f"deferred to {self.scheduler.next_reset:%d %B %Y, %H:%M} UTC") for submission_file in deferred_files])
+        logger.info("========== Reported Generated Complete ================")
+
+    @staticmethod
+    def leader_board_row(challenge):
+        """Get the leaderboard row of the user in the challenge, None if the user is not ranked."""
+        return challenge.get_leaderboard_data(user_name="MuhammadQasimShabbeer")
+
+    def competition_submission_files(self, competition) -> list:
+        """Get the files to submit today, all the csv files of the competition folder without scheduler."""
+        if self.scheduler is not None:
+            return self.scheduler.scheduled(competition)
+        competition_directory = os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder, competition)
+        return [os.path.join(str(competition_directory), f)
+                for f in sorted(os.listdir(str(competition_directory))) if f.endswith(".csv")]
+
+    def append_report_rows(self, report_rows: list) -> None:
+        """Add rows to the report and write it."""
+        with self.report_lock:
+            for report_dataframe_new_row in report_rows:
+                self.report_dataframe.loc[len(self.report_dataframe)] = report_dataframe_new_row
+                if report_dataframe_new_row["Submission id"] in self.scores:  # scored before its row was written
+                    self.write_score(report_dataframe_new_row["Submission id"])
+            self.report_dataframe.to_csv(CONFIG.ReportsFiles.submission_posted_report, index=False)
+
+    def attach_score(self, submission_id, score, rank_after_scoring, status) -> None:
+        """Attach the final score and the rank after scoring of a submission to its report row."""
+        logger.info(f"Submission {submission_id} : {status}, score {score}, rank after scoring {rank_after_scoring}")
+        with self.report_lock:
+            self.scores[submission_id] = (score, rank_after_scoring, status)
+            if (self.report_dataframe["Submission id"] == submission_id).any():
+                self.write_score(submission_id)
+                self.report_dataframe.to_csv(CONFIG.ReportsFiles.submission_posted_report, index=False)
+
+    def write_score(self, submission_id) -> None:
+        """Write a known score in the report rows of the submission, the report lock is held by the caller."""
+        score, rank_after_scoring, status = self.scores.pop(submission_id)
+        rows = self.report_dataframe["Submission id"] == submission_id
+        self.report_dataframe.loc[rows, "Submission score"] = score
+        self.report_dataframe.loc[rows, "Rank after submission"] = rank_after_scoring
+        self.report_dataframe.loc[rows, "Submission status"] = status
+
+    def wait_for_scores(self, timeout=None) -> bool:
+        """Wait for the scores of the submissions of this run, return False if some are still in processing."""
+        return self.score_poller.wait(timeout=timeout)
+
+    def process_competition(self, current_selected_challenge, submit=True, competition_data=None) -> list:
+        """Process one selected competition, return its report rows, the files are submitted only if submit.
+        competition_data is the (challenge, limits, leaderboard row) already read, they are read here if None."""
+        report_rows = []
+        if competition_data is None:
+            challenge = self.user.challenge(current_selected_challenge)
+            daily_remaining_submission_data = challenge.submission_limits()
+            leader_board_data = self.leader_board_row(challenge)
+        else:
+            challenge, daily_remaining_submission_data, leader_board_data = competition_data
+        current_selected_challenge = challenge.id
+        logger.info(f"Processing Competition : {current_selected_challenge}")
+
+        if self.print_user_daily_remaining_submission_competetion:
+            logger.info(f"before submission file posting remaining submission {daily_remaining_submission_data['data']['today']}")
+
+
+        if self.print_leader_board_for_selected_competetion:
+            challenge.leaderboard(user_name_for_rank="MuhammadQasimShabeer")
+
+        if self.print_user_rank_for_selected_competetion:
+            rank = challenge.my_rank(user_name_for_rank="MuhammadQasimShabeer")
+            logger.info(f" your current rank in this competetion is {rank}")
+
+        if self.download_competetion_dataset_for_selected_challenge:
+            # one folder per competition, so its manifest and its partial downloads are not shared
+            challenge.download_dataset(destination=os.path.join("output", current_selected_challenge),
+                                       extract=CONFIG.ZindiApi.extract_archives)  # Download the dataset of the selected challenge
+            logger.info(f"data is download successfully for {current_selected_challenge}")
+            # # user.submission_board()
+
+        if self.submit_submission_file_for_selected_competetion and submit:
+            logger.info(f"Starting Submissions posting for {current_selected_challenge}")
+            submission_files = self.competition_submission_files(current_selected_challenge)
+            logger.info(f"Total submission files {len(submission_files)} for competetion in Submission In Progress")
+            self.resume_submissions(challenge)
+            problems = {} if self.validator is None else self.validator.validate_files(challenge, submission_files)
+            for submission_file in submission_files:  # grows when a skipped file gives its slot to a deferred file
+                report_row, daily_remaining_submission_data = self.submit_file(
+                    challenge, submission_file, daily_remaining_submission_data, leader_board_data,
+                    problems.get(submission_file))
+                report_rows.append(report_row)
+                if report_row["Submission status"].startswith(("duplicate", "invalid")) and self.scheduler is not None:
+                    released = self.scheduler.release(current_selected_challenge)
+                    if released is not None:
+                        submission_files.append(released)
+
+            if self.scheduler is not None:
+                for submission_file in self.scheduler.deferred(current_selected_challenge):
+                    report_rows.append(self.report_row(current_selected_challenge, daily_remaining_submission_data,
+                                                       leader_board_data, None, submission_file,
+                                                       f"deferred to {self.scheduler.next_reset:%d %B %Y, %H:%M} UTC"))
+        logger.info(f"Submission posting Completed {current_selected_challenge}")
+        return report_rows
+
+    def resume_submissions(self, challenge) -> None:
+        """Reconcile the ledger with the submission board, then close the uploads interrupted by a crash."""
+        competition_directory = os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder, challenge.id)
+        n_reconciled = self.ledger.reconcile(challenge.id, challenge.submission_board(to_print=False),
+                                             competition_directory)
+        logger.info(f"{n_reconciled} submission(s) of the submission board added to the ledger")
+        n_recovered = self.journal.resume(challenge.id, self.ledger)
+        if n_recovered:
+            logger.info(f"{n_recovered} interrupted upload(s) found on the submission board of {challenge.id}")
+
+    def submit_file(self, challenge, submission_file, daily_limit_data, leader_board_data, problems=None) -> tuple:
+        """Submit one file unless it is invalid or its predictions were already submitted, return its report row and
+        the limits, the file is validated here when its validation problems are not given."""
+        if problems is None and self.validator is not None:
+            problems = self.validator.validate(challenge, submission_file)
+        if problems:
+            logger.info(f"Skipping {submission_file}, invalid: {'; '.join(problems)}")
+            return self.report_row(challenge.id, daily_limit_data, leader_board_data, None, submission_file,
+                                   f"invalid: {'; '.join(problems)}"), daily_limit_data
+        content_hash = self.ledger.content_hash(submission_file)
+        duplicate_of = self.ledger.duplicate_of(challenge.id, content_hash)
+        if duplicate_of is None and self.journal.confirmed(challenge.id, content_hash):
+            duplicate_of = "a confirmed submission of the journal"
+        if duplicate_of is not None:
+            logger.info(f"Skipping {submission_file}, same predictions as the submitted {duplicate_of}")
+            self.archive_submitted_file(challenge.id, submission_file)
+            return self.report_row(challenge.id, daily_limit_data, leader_board_data, None, submission_file,
+                                   f"duplicate of {duplicate_of}"), daily_limit_data
+
+        intent_id = self.journal.intent(challenge.id, submission_file, content_hash)  # written before the upload
+        submission_id = challenge.submit(filepaths=[submission_file], comments=['API  submission'])[0]
+        self.journal.outcome(intent_id, "submitted" if submission_id is not None else "failed", submission_id)
+        if submission_id is not None:
+            self.ledger.record(challenge.id, content_hash, os.path.basename(submission_file), submission_id)
+            self.archive_submitted_file(challenge.id, submission_file)
+            self.score_poller.track(challenge.id, submission_id)  # the rank is attached once the score is final
+        daily_limit_data = challenge.submission_limits()
+        return self.report_row(challenge.id, daily_limit_data, leader_board_data, None, submission_file,
+                               "submitted" if submission_id is not None else "failed", submission_id
+                               ), daily_limit_data
+
+    @staticmethod
+    def archive_submitted_file(competition, submission_file) -> None:
+        """Move a file whose predictions are submitted to the submitted folder of its competition, so it is
+        neither scheduled nor reported again."""
+        submitted_directory = os.path.join(CONFIG.ZindiCompetetionFilesPath.competetion_folder, competition,
+                                           CONFIG.ZindiCompetetionFilesPath.submitted_folder)
+        os.makedirs(submitted_directory, exist_ok=True)
+        destination_file = os.path.join(submitted_directory, os.path.basename(submission_file))
+        if os.path.exists(destination_file):  # a file submitted before under the same name is kept
+            stem, extension = os.path.splitext(destination_file)
+            destination_file = f"{stem}_{time.strftime('%Y%m%d%H%M%S')}{extension}"
+        try:
+            shutil.move(submission_file, destination_file)
+        except OSError as e:
+            logger.info(f"{submission_file} not moved to {submitted_directory}: {e}")
+
+    def submit_queued_file(self, competition, submission_file) -> dict:
+        """Submit one file routed by the watcher, without scanning the other competitions, and report it."""
+        challenge = self.user.challenge(competition)
+        if self.journal.pending(competition):
+            self.resume_submissions(challenge)
+        daily_limit_data = challenge.submission_limits()
+        leader_board_data = self.leader_board_row(challenge)
+        remaining = (daily_limit_data or {}).get('data', {}).get('today')
+        if remaining is not None and remaining <= 0:  # unknown limits : the upload is tried
+            next_reset = "the next quota reset" if self.scheduler is None else \
+                f"{self.scheduler.next_reset:%d %B %Y, %H:%M} UTC"
+            logger.info(f"No submission left today for {competition}, {submission_file} waits for {next_reset}")
+            report_row = self.report_row(competition, daily_limit_data, leader_board_data, None, submission_file,
+                                         f"deferred to {next_reset}")
+        else:
+            report_row, _ = self.submit_file(challenge, submission_file, daily_limit_data, leader_board_data)
+        self.append_report_rows([report_row])
+        return report_row
+
+    @staticmethod
+    def report_row(competition, daily_limit_data, leader_board_data, rank_after_submission, submission_file,
+                   status, submission_id=None) -> dict:
+        """Build the report row of one submission file, the limits and the leaderboard row can be None, e.g. when the
+        user is not on the leaderboard yet."""
+        daily_limit_data = daily_limit_data['data'] if daily_limit_data else {}
+        leader_board_data = leader_board_data if leader_board_data else [None] * 4
+        return {
+            "Competetion Name": competition,
+            "today_remaining_submission": daily_limit_data.get('today'),
+            "today_total_submitted": daily_limit_data.get('submitted_today'),
+            "Best Score": leader_board_data[1],
+            "Best rank": leader_board_data[0],
+            "user name": leader_board_data[2],
+            "Best submission time": leader_board_data[3],
+            "Rank after submission": rank_after_submission,
+            "Submission file": os.path.basename(submission_file),
+            "Submission status": status,
+            "Submission id": submission_id,
+            "Submission score": None,
+        }
@@ -9,6 +9,18 @@ def task():
     except Exception as e:
         raise e
 
+
+def daemon():
+    """Point of entry for the long running process, submitting at each quota reset or new files"""
+    process = Processes()
+    process.run_daemon()
+
+
+def watch():
+    """Point of entry for the watch mode, submitting each file as soon as it lands in the submission folder"""
+    process = Processes()
+    process.watch()
+
 if __name__ == "__main__":
         task()
 
@@ -0,0 +1,104 @@
+import io
+import os
+import re
+
+import pytest
+
+from libraries.zindi.utils import download
+
+CONTENT = bytes(range(256)) * 64  # 16 KB, every byte offset distinguishable
+ETAG = '"v1"'
+
+
+class RangedResponse:
+    """A streamed response of the fake session, cut after `interrupt_after` bytes if set."""
+
+    def __init__(self, status_code, body, headers, interrupt_after=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.raw = self
+        self.body = io.BytesIO(body)
+        self.interrupt_after = interrupt_after
+
+    def read(self, size, decode_content=True):
+        if self.interrupt_after is not None:
+            if self.body.tell() >= self.interrupt_after:
+                raise ConnectionError("interrupted")
+            size = min(size, self.interrupt_after - self.body.tell())
+        return self.body.read(size)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+    def close(self):
+        pass
+
+
+class RangedSession:
+    """Serve CONTENT with ranges and If-Range, every response cut after `interrupt_after` bytes if set."""
+
+    def __init__(self, content=CONTENT, interrupt_after=None):
+        self.content = content
+        self.interrupt_after = interrupt_after
+        self.requests = []
+
+    def get(self, url, headers, data=None, stream=True):
+        self.requests.append(dict(headers))
+        requested = headers.get("Range")
+        if requested and headers.get("If-Range") not in (None, ETAG):
+            requested = None
+        if requested is None:
+            return RangedResponse(200, self.content, {"content-length": str(len(self.content)), "ETag": ETAG},
+                                  self.interrupt_after)
+        first, last = re.match(r"bytes=(\d+)-(\d*)", requested).groups()
+        first, last = int(first), int(last) if last else len(self.content) - 1
+        if first >= len(self.content):
+            return RangedResponse(416, b"", {})
+        body = self.content[first:last + 1]
+        return RangedResponse(206, body, {"content-length": str(len(body)), "ETag": ETAG,
+                                          "Content-Range": f"bytes {first}-{last}/{len(self.content)}"},
+                              self.interrupt_after)
+
+
+def fetch(filename, session, segments):
+    return download(url="https://zindi/file.csv", filename=str(filename), headers={"auth_token": "token"},
+                    session=session, progress=lambda size: None, segments=segments, segment_threshold=1,
+                    metadata={"size": len(CONTENT), "etag": ETAG, "last_modified": None})
+
+
+@pytest.mark.parametrize("first_segments, second_segments", [(4, 2), (2, 4), (4, 1), (1, 4), (4, 4)])
+def test_resume_with_other_segments_gives_the_file(tmp_path, first_segments, second_segments):
+    filename = tmp_path / "file.csv"
+    with pytest.raises(Exception):
+        fetch(filename, RangedSession(interrupt_after=1000), first_segments)
+    assert not filename.exists()
+
+    fetch(filename, RangedSession(), second_segments)
+
+    assert filename.read_bytes() == CONTENT
+    assert os.listdir(tmp_path) == ["file.csv"]
+
+
+def test_resumed_segments_only_request_the_missing_bytes(tmp_path):
+    filename = tmp_path / "file.csv"
+    with pytest.raises(Exception):
+        fetch(filename, RangedSession(interrupt_after=1000), 4)
+    session = RangedSession()
+
+    fetch(filename, session, 4)
+
+    assert filename.read_bytes() == CONTENT
+    assert sorted(request["Range"] for request in session.requests) == \
+        sorted(f"bytes={start + 1000}-{start + 4095}" for start in range(0, 16384, 4096))
+    assert all(request["If-Range"] == ETAG for request in session.requests)
+
+
+def test_single_segment_does_not_stitch_parts(tmp_path):
+    filename = tmp_path / "file.csv"
+    session = RangedSession()
+
+    fetch(filename, session, 1)
+
+    assert filename.read_bytes() == CONTENT
+    assert [request.get("Range") for request in session.requests] == [None]
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from libraries import metric_engine
+from libraries.metric_engine import MetricEngine, _binary_auc, _f1, _load_labels, _logloss, _positions, \
+    _read_columns, score_file
+
+LABELS = "ID,target\na,1\nb,0\nc,1\nd,0\n"
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def reader(request, monkeypatch):
+    """Run a test with the pyarrow reader and with the pandas fallback, on an empty labels cache."""
+
+    monkeypatch.setattr(metric_engine, "_labels_cache", {})
+    if request.param == "pandas":
+        monkeypatch.setattr(metric_engine, "pyarrow", None)
+    return request.param
+
+
+def write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def column(*values):
+    return np.array(values, dtype=np.float64).reshape(-1, 1)
+
+
+## Metrics
+def test_binary_auc_gives_ties_half_a_pair():
+    y = np.array([0.0, 0.0, 1.0, 1.0])
+
+    assert _binary_auc(y, np.array([0.1, 0.5, 0.5, 0.9])) == pytest.approx(3.5 / 4)
+    assert _binary_auc(y, np.array([0.3, 0.3, 0.3, 0.3])) == pytest.approx(0.5)
+    assert _binary_auc(y, np.array([0.9, 0.8, 0.2, 0.1])) == pytest.approx(0.0)
+
+
+def test_binary_auc_of_a_single_class_is_nan():
+    assert np.isnan(_binary_auc(np.array([1.0, 1.0]), np.array([0.2, 0.4])))
+
+
+def test_binary_f1_is_the_f1_of_the_positive_class_at_half():
+    y = column(1, 1, 0, 0)
+    p = column(0.9, 0.2, 0.7, 0.1)  # one true positive, one false positive, one false negative
+
+    assert _f1(y, p, binary=True) == pytest.approx(0.5)
+    assert _f1(y, column(0.1, 0.1, 0.1, 0.1), binary=True) == 0.0
+
+
+def test_macro_f1_averages_the_classes_of_the_labels():
+    y = np.eye(3)[[0, 1, 2, 2]]
+    p = np.eye(3)[[0, 2, 2, 1]] * 0.8 + 0.05  # argmax 0, 2, 2, 1
+
+    assert _f1(y, p, binary=False) == pytest.approx((1.0 + 0.0 + 0.5) / 3)
+
+
+def test_logloss_binary_and_multiclass():
+    assert _logloss(column(1, 0), column(0.8, 0.4), True) == pytest.approx(-(np.log(0.8) + np.log(0.6)) / 2)
+    assert np.isfinite(_logloss(column(1, 0), column(1.0, 0.0), True))  # clipped, not infinite
+
+    y = np.eye(3)[[0, 2]]
+    p = np.array([[2.0, 1.0, 1.0], [1.0, 1.0, 2.0]])  # normalized by row to 0.5, 0.25, 0.25
+    assert _logloss(y, p, False) == pytest.approx(-np.log(0.5))
+
+
+## Rows matching
+def positions(tmp_path, submission):
+    labels_path = write(tmp_path, "labels.csv", LABELS)
+    labels = _load_labels(labels_path, chunk_rows=2)
+    ids, _ = _read_columns(write(tmp_path, "submission.csv", submission), ["ID", "target"], chunk_rows=2)
+    return list(_positions(labels, ids))
+
+
+def test_positions_in_the_labels_order(tmp_path, reader):
+    assert positions(tmp_path, LABELS) == [0, 1, 2, 3]
+
+
+def test_positions_of_shuffled_ids(tmp_path, reader):
+    assert positions(tmp_path, "ID,target\nc,1\na,1\nd,0\nb,0\n") == [2, 0, 3, 1]
+
+
+def test_positions_of_unknown_and_duplicate_ids(tmp_path, reader):
+    assert positions(tmp_path, "ID,target\nb,0\nz,1\nb,1\na,0\n") == [1, -1, 1, 0]
+
+
+## Files
+def test_score_file_matches_rows_by_id(tmp_path, reader):
+    labels_path = write(tmp_path, "labels.csv", LABELS)
+    shuffled = write(tmp_path, "shuffled.csv", "ID,target\nd,0\nextra,1\nc,1\nb,0\na,1\n")
+
+    assert score_file(labels_path, "accuracy", shuffled, chunk_rows=2) == 1.0
+    assert score_file(labels_path, "auc", shuffled, chunk_rows=2) == 1.0
+
+
+def test_score_file_requires_every_holdout_id(tmp_path, reader):
+    labels_path = write(tmp_path, "labels.csv", LABELS)
+
+    with pytest.raises(ValueError, match="1 holdout id"):
+        score_file(labels_path, "rmse", write(tmp_path, "missing.csv", "ID,target\na,1\nb,0\nc,1\n"))
+
+
+def test_rank_puts_the_best_files_first_and_the_unscored_last(tmp_path):
+    labels_path = write(tmp_path, "labels.csv", LABELS)
+    engine = MetricEngine({"c1": {"path": labels_path, "metric": "rmse"}})
+    worse = write(tmp_path, "worse.csv", "ID,target\na,0.5\nb,0.5\nc,0.5\nd,0.5\n")
+    best = write(tmp_path, "best.csv", LABELS)
+    broken = write(tmp_path, "broken.csv", "ID,other\na,1\n")
+
+    assert engine.rank("c1", [broken, worse, best]) == [best, worse, broken]
+    assert engine.rank("c2", [broken, worse, best]) == [broken, worse, best]